@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+from typing import Any, Optional
+
+
+def write_bytes(path: str, body: bytes) -> None:
+    """
+    先写同目录下的临时文件并 fsync，再 os.replace 覆盖。
+    读的人要么看到旧文件，要么看到完整的新文件；中途崩溃只会留下 .tmp。
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_bytes_if_changed(path: str, body: bytes) -> bool:
+    """内容一样就不碰文件（mtime 也不变），返回是否写了"""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == body:
+                return False
+    except OSError:
+        pass
+    write_bytes(path, body)
+    return True
+
+
+def write_json(path: str, obj: Any, **dump_kwargs: Any) -> None:
+    """json.dump 的原子版本；dump_kwargs 原样传给 json.dumps (indent, sort_keys, ...)"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    write_bytes(path, json.dumps(obj, **dump_kwargs).encode("utf-8"))
+
+
+def read_json(path: str) -> Optional[Any]:
+    """读 JSON 文件；不存在或者坏了（写到一半的旧版本等）返回 None"""
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
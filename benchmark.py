@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import atomic_io
+import bundle
+import lookahead
+import menu_archive
+import menu_writer
+import nutrislice_cache
+import nutrislice_replay
+import nutrition
+import registry
+import scrape_all
+import search_index
+
+# 用 nutrislice_replay 录下的 fixture 跑完整流程，各阶段计时后和这份基线比
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+
+# 计时比基线慢这么多（且至少慢 MIN_DELTA 秒）算退化；请求数 / 字节数变多就算
+TOLERANCE = 0.25
+MIN_DELTA = 0.005
+
+
+def _peak_rss_mb() -> float:
+    """进程到目前为止的峰值 RSS（Linux 上 ru_maxrss 是 KB，macOS 上是字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = fn()
+    return round(time.perf_counter() - start, 4), result
+
+
+def _clear_parsed() -> None:
+    """删掉解析缓存，下一次 build_menu 会重新解码、解析、分类"""
+    for path in glob.glob(os.path.join(nutrislice_cache.CACHE_DIR, "**", "*.parsed.json"), recursive=True):
+        os.remove(path)
+
+
+def _traffic(server: Any, before: Dict[str, Any]) -> Dict[str, Any]:
+    stats = server.stats
+    status = {str(k): v - before["status"].get(k, 0) for k, v in stats["status"].items()}
+    return {
+        "requests": stats["requests"] - before["requests"],
+        "bytes": stats["bytes"] - before["bytes"],
+        "status": {k: v for k, v in status.items() if v},
+    }
+
+
+def _snapshot(server: Any) -> Dict[str, Any]:
+    return {"requests": server.stats["requests"], "bytes": server.stats["bytes"], "status": dict(server.stats["status"])}
+
+
+def run(today: datetime.date, repeat: int = 3, latency: float = 0.0) -> Dict[str, Any]:
+    """
+    在临时目录里跑一遍：冷缓存抓取 -> 各地点解析 + 分类（清掉解析缓存重复 repeat 次取最小）
+    -> 写文件 -> look-ahead / archive / 营养表 / bundle / 搜索索引 -> 全部 304 的重新验证。
+    latency 单位是秒，加在替身服务器的每个响应上。
+    """
+    fixtures = os.path.abspath(nutrislice_replay.FIXTURE_DIR)
+    if not os.path.isdir(fixtures):
+        raise FileNotFoundError(f"No fixtures in {fixtures}; run 'python nutrislice_replay.py record' first")
+
+    cwd = os.getcwd()
+    saved = (nutrislice_replay.FIXTURE_DIR, nutrislice_cache.CACHE_DIR, nutrislice_cache.API_BASE)
+    revalidate_after = nutrislice_cache.REVALIDATE_AFTER
+    workdir = tempfile.mkdtemp(prefix="wolfie-bench-")
+    server, base = nutrislice_replay.start(latency=latency, seed=0)
+
+    now = datetime.datetime.combine(today, datetime.time(12, 0), ZoneInfo("America/New_York"))
+    locations = [loc for loc in registry.all_locations() if registry.builder(loc) is not None]
+    stages: Dict[str, Any] = {}
+
+    try:
+        os.chdir(workdir)
+        nutrislice_replay.FIXTURE_DIR = fixtures
+        nutrislice_cache.CACHE_DIR = os.path.join(workdir, "cache")
+        nutrislice_cache.API_BASE = base
+
+        before = _snapshot(server)
+        seconds, _ = _timed(lambda: scrape_all.prefetch(today))
+        stages["fetch"] = {"seconds": seconds, **_traffic(server, before)}
+
+        parse: Dict[str, List[float]] = {loc["id"]: [] for loc in locations}
+        outputs: Dict[str, Dict[str, Any]] = {}
+        for _ in range(max(1, repeat)):
+            _clear_parsed()
+            for loc in locations:
+                build = registry.builder(loc)
+                seconds, outputs[loc["id"]] = _timed(lambda: build(today, now))
+                parse[loc["id"]].append(seconds)
+        stages["parse"] = {loc_id: min(times) for loc_id, times in parse.items()}
+        stages["items"] = {
+            loc_id: sum(1 for _ in menu_archive.rows_from_output(out, today.isoformat()))
+            for loc_id, out in outputs.items()
+        }
+
+        stages["write"] = {}
+        for loc_id, out in outputs.items():
+            stages["write"][loc_id], _ = _timed(lambda: menu_writer.write_location(loc_id, out))
+
+        post: List[Tuple[str, Callable[[], Any]]] = [
+            ("lookahead", lambda: lookahead.write_lookahead(now)),
+            ("archive", lambda: menu_archive.archive_current(today)),
+            ("nutrition", lambda: nutrition.write_table(today)),
+            ("bundle", bundle.write_bundle),
+            ("search", search_index.write_index),
+        ]
+        for name, fn in post:
+            before = _snapshot(server)
+            seconds, _ = _timed(fn)
+            stages[name] = {"seconds": seconds, **_traffic(server, before)}
+
+        nutrislice_cache.REVALIDATE_AFTER = 0
+        before = _snapshot(server)
+        seconds, _ = _timed(lambda: scrape_all.prefetch(today))
+        stages["revalidate"] = {"seconds": seconds, **_traffic(server, before)}
+    finally:
+        nutrislice_replay.FIXTURE_DIR, nutrislice_cache.CACHE_DIR, nutrislice_cache.API_BASE = saved
+        nutrislice_cache.REVALIDATE_AFTER = revalidate_after
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "date": today.isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "latency_ms": round(latency * 1000),
+        "stages": stages,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def flatten(report: Dict[str, Any]) -> Dict[str, float]:
+    """{"fetch.seconds": ..., "parse.east_dining": ..., "peak_rss_mb": ...}；status 明细不参与比较"""
+    out: Dict[str, float] = {"peak_rss_mb": report["peak_rss_mb"]}
+    for stage, value in report["stages"].items():
+        if not isinstance(value, dict):
+            out[stage] = value
+            continue
+        for k, v in value.items():
+            if isinstance(v, (int, float)):
+                out[f"{stage}.{k}"] = v
+    return out
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = TOLERANCE) -> List[str]:
+    """返回退化项的说明；items.* 只要和基线不同就报（fixture 一样时解析结果应当一样）"""
+    new, old = flatten(report), flatten(baseline)
+    regressions = []
+    for key, value in new.items():
+        if key not in old:
+            continue
+        base = old[key]
+        if key.startswith("items."):
+            bad = value != base
+        elif key.endswith(".requests") or key.endswith(".bytes"):
+            bad = value > base
+        elif key == "peak_rss_mb":
+            bad = value > base * (1 + tolerance)
+        else:
+            bad = value > base * (1 + tolerance) and value - base > MIN_DELTA
+        if bad:
+            regressions.append(f"{key}: {base} -> {value}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    old = flatten(baseline) if baseline else {}
+    for key, value in flatten(report).items():
+        line = f"{key:32s} {value:>12}"
+        if key in old:
+            line += f"   (baseline {old[key]})"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scrape pipeline against recorded Nutrislice fixtures.")
+    parser.add_argument("--date", help="menu date to replay, YYYY-MM-DD (default: today)")
+    parser.add_argument("--repeat", type=int, default=3, help="parse runs per location; the fastest is kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every stand-in response")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args(argv)
+
+    today = datetime.date.fromisoformat(args.date) if args.date else scrape_all.ny_now().date()
+    report = run(today, args.repeat, args.latency / 1000)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, baseline)
+
+    if args.save_baseline:
+        atomic_io.write_json(args.baseline, report, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        return 0
+    regressions = compare(report, baseline, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+import atomic_io
+import dish_dict
+import registry
+import search_index
+
+try:
+    import brotli
+except ImportError:  # 没装 brotli 时只出 .gz
+    brotli = None
+
+# 所有地点合成一个文件，前端一次请求拿全；按内容 hash 做版本号，URL 不变时浏览器 / CDN 可以直接用缓存
+BUNDLE_PATH = "all_menus.json"
+
+# bundle 里的菜名换成 dish id，名字放在单独缓存的 dishes.json 里；设为 0 输出原来的菜名
+DISH_IDS = os.environ.get("WOLFIE_DISH_IDS", "1") != "0"
+
+
+def build_bundle(dish_ids: bool = DISH_IDS) -> Dict[str, Any]:
+    """
+    {"locations": {data_key: 该地点的 json}}；文件不存在 / 坏掉的地点为 None。
+    dish_ids=True 时所有 items 换成 dish id，并带上 "dishes": {"file", "hash", "count"}。
+    """
+    locations = {loc["data_key"]: atomic_io.read_json(loc["output"]) for loc in registry.all_locations()}
+    if not dish_ids:
+        return {"locations": locations}
+
+    dictionary = dish_dict.load()
+    encoded = {key: dish_dict.encode_output(out, dictionary) for key, out in locations.items()}
+    return {"dishes": dish_dict.save(dictionary), "locations": encoded}
+
+
+def write_bundle(path: str = BUNDLE_PATH, dish_ids: bool = DISH_IDS) -> Dict[str, Any]:
+    """
+    写出压缩过空白的 bundle 以及 .gz / .br 副本，返回写进 manifest 的信息：
+      {"file", "hash", "bytes", "gzip_bytes", "brotli_bytes", "dishes"}
+    gzip 的 mtime 固定为 0，内容不变时压缩文件也逐字节不变。
+    """
+    data = build_bundle(dish_ids)
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:16]
+
+    gz = gzip.compress(body, compresslevel=9, mtime=0)
+    atomic_io.write_bytes_if_changed(path, body)
+    atomic_io.write_bytes_if_changed(path + ".gz", gz)
+
+    info: Dict[str, Any] = {"file": path, "hash": digest, "bytes": len(body), "gzip_bytes": len(gz)}
+
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        atomic_io.write_bytes_if_changed(path + ".br", br)
+        info["brotli_bytes"] = len(br)
+
+    if "dishes" in data:
+        info["dishes"] = data["dishes"]
+
+    return info
+
+
+if __name__ == "__main__":
+    info = write_bundle()
+    # 营养表要读 Nutrislice 缓存、增量要跟着抓取走，这里都不重算，沿用 manifest 里已有的
+    previous = atomic_io.read_json(registry.MANIFEST_PATH) or {}
+    registry.write_manifest(
+        bundle=info,
+        search=search_index.write_index(),
+        nutrition=previous.get("nutrition"),
+        changes=previous.get("changes"),
+        hours=previous.get("hours"),
+    )
+    print(f"Successfully wrote {info['file']} ({info['bytes']} bytes, hash {info['hash']})")
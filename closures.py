@@ -0,0 +1,50 @@
+import datetime
+import threading
+from typing import Any, Dict, Iterable, Tuple
+
+import registry
+
+# 这次运行里解析出来的关门 / 放假：(school, menu_type, 日期) -> 原因。
+# nutrislice_parse.load_parsed_day 和 east / west 的 build_menu 每次拿到 status 为 closed 的解析结果（不管是否命中缓存）都记一笔，
+# schedule 编译营业时间表时把它们当成当天的临时调整
+_found: Dict[Tuple[str, str, str], str] = {}
+_lock = threading.Lock()
+
+
+def record(school: str, menu_type: str, date_str: str, result: Any) -> None:
+    if isinstance(result, dict) and result.get("status") == "closed":
+        with _lock:
+            _found[(school, menu_type, date_str)] = result.get("message") or "Closed"
+
+
+def found() -> Dict[Tuple[str, str, str], str]:
+    with _lock:
+        return dict(_found)
+
+
+def overrides(dates: Iterable[datetime.date]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    {日期: {地点 id: {"stalls": {档口名: []}, "reasons": {档口名: 原因}, "hours": []}}}，形状和 schedule.json 的 overrides 一致。
+    只算菜单就是当天的档口（daily）；用固定日期菜单的档口那天关门不代表今天关门。
+    登记的档口全关了，整个地点也算关门（加上 "hours": []）。
+    """
+    closed_days = found()
+    out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for d in dates:
+        iso = d.isoformat()
+        for loc in registry.all_locations():
+            stalls = loc.get("stalls", [])
+            reasons = {
+                s["section"]: closed_days[(s["school"], s["menu_type"], iso)]
+                for s in stalls
+                if registry.stall_type(s) == registry.STALL_TYPE_NUTRISLICE
+                and registry.stall_date(s, d) == d
+                and (s["school"], s["menu_type"], iso) in closed_days
+            }
+            if not reasons:
+                continue
+            entry: Dict[str, Any] = {"stalls": {name: [] for name in reasons}, "reasons": reasons}
+            if len(reasons) == len(stalls):
+                entry["hours"] = []
+            out.setdefault(iso, {})[loc["id"]] = entry
+    return out
@@ -1,170 +1,32 @@
-import json
 import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict
 
-import requests
+import menu_writer
+import nutrislice_cache
+import nutrislice_parse
+import registry
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
-    "Accept": "application/json",
-}
+LOCATION_ID = "dental_cafe"
 
-API_TEMPLATE = (
-    "https://stonybrook.api.nutrislice.com/menu/api/weeks/school/sbu-eats-events/"
-    "menu-type/dental-cafe/{year}/{month}/{day}/?format=json"
-)
+STALL = registry.stalls(LOCATION_ID)[0]
+SCHOOL = STALL["school"]
+MENU_TYPE = STALL["menu_type"]
 
+PARSE_KEY = "dental_cafe:v3"
 
-def eastern_now() -> datetime.datetime:
-    return datetime.datetime.utcnow() - datetime.timedelta(hours=5)
-
-
-def safe_food_name(mi: Dict[str, Any]) -> Optional[str]:
-    food = mi.get("food") or {}
-    if isinstance(food, dict):
-        name = food.get("name")
-        if isinstance(name, str) and name.strip():
-            return name.strip()
-    return None
-
-
-def is_header_item(mi: Dict[str, Any]) -> bool:
-    if mi.get("food"):
-        return False
-    return bool(mi.get("is_section_title") or mi.get("is_station_header"))
-
-
-def header_text(mi: Dict[str, Any]) -> Optional[str]:
-    for k in ("text", "name", "label", "description", "menu_item_name"):
-        v = mi.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
-    return None
-
-
-def pick_section_name(mi: Dict[str, Any], current_section: Optional[str]) -> str:
-    mc = mi.get("menu_category")
-    cat = mi.get("category")
-
-    mc_name = mc.get("name") if isinstance(mc, dict) else None
-    cat_name = cat.get("name") if isinstance(cat, dict) else None
-
-    sec = (
-        mc_name
-        or cat_name
-        or mi.get("category_name")
-        or mi.get("station")
-        or "Other"
-    )
-
-    if (not sec or sec == "Other") and current_section:
-        sec = current_section
-
-    if not isinstance(sec, str) or not sec.strip():
-        return current_section or "Other"
-
-    return sec.strip()
+PARSE_OPTIONS = {"header_mode": nutrislice_parse.HEADER_MODE_FLAG, "output": nutrislice_parse.OUTPUT_SECTIONS}
 
 
-def dedupe_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
+def eastern_now() -> datetime.datetime:
+    return datetime.datetime.utcnow() - datetime.timedelta(hours=5)
 
 
 def fetch_daily_menu(date_obj: datetime.date) -> Dict[str, Any]:
-    url = API_TEMPLATE.format(
-        year=date_obj.year,
-        month=f"{date_obj.month:02d}",
-        day=f"{date_obj.day:02d}",
-    )
-    date_str = date_obj.strftime("%Y-%m-%d")
+    url = nutrislice_cache.week_url(SCHOOL, MENU_TYPE, date_obj)
 
     try:
-        r = requests.get(url, headers=HEADERS, timeout=25)
-        r.raise_for_status()
-        data = r.json()
-
-        day_block = None
-        for d in data.get("days", []):
-            if d.get("date") == date_str:
-                day_block = d
-                break
-
-        if not day_block:
-            return {
-                "status": "no_data_today",
-                "message": f"API missing {date_str}",
-                "source_url": url,
-                "sections": [],
-            }
-
-        menu_items = day_block.get("menu_items") or []
-        if not menu_items:
-            return {
-                "status": "no_data_today",
-                "message": f"{date_str} menu_items empty",
-                "source_url": url,
-                "sections": [],
-            }
-
-        if (
-            len(menu_items) == 1
-            and isinstance(menu_items[0], dict)
-            and menu_items[0].get("is_holiday")
-            and isinstance(menu_items[0].get("text"), str)
-        ):
-            return {
-                "status": "closed",
-                "message": menu_items[0].get("text").strip(),
-                "source_url": url,
-                "sections": [],
-            }
-
-        section_map: Dict[str, List[str]] = {}
-        current_section: Optional[str] = None
-
-        for mi in menu_items:
-            if not isinstance(mi, dict):
-                continue
-
-            if is_header_item(mi):
-                ht = header_text(mi)
-                if ht:
-                    current_section = ht
-                continue
-
-            name = safe_food_name(mi)
-            if not name:
-                continue
-
-            sec = pick_section_name(mi, current_section)
-            section_map.setdefault(sec, []).append(name)
-
-        sections_out: List[Dict[str, Any]] = []
-        for sec_name, items in section_map.items():
-            items2 = dedupe_preserve_order(items)
-            if items2:
-                sections_out.append({"section": sec_name, "items": items2})
-
-        if not sections_out:
-            return {
-                "status": "no_data_today",
-                "message": "No food names parsed",
-                "source_url": url,
-                "sections": [],
-            }
-
-        return {
-            "status": "ok",
-            "message": "Menu fetched.",
-            "source_url": url,
-            "sections": sections_out,
-        }
+        parsed = nutrislice_parse.load_parsed_day(SCHOOL, MENU_TYPE, date_obj, PARSE_KEY, PARSE_OPTIONS)
+        return {**parsed, "source_url": url}
 
     except Exception as e:
         return {
@@ -175,28 +37,33 @@ def fetch_daily_menu(date_obj: datetime.date) -> Dict[str, Any]:
         }
 
 
-def main() -> None:
-    now_eastern = eastern_now()
-    today = now_eastern.date()
-
-    fetched = fetch_daily_menu(today)
+def build_menu(menu_date: datetime.date, now_eastern: datetime.datetime) -> Dict[str, Any]:
+    fetched = fetch_daily_menu(menu_date)
 
     out: Dict[str, Any] = {
         "location": "Dental Café",
-        "date": today.strftime("%Y-%m-%d"),
+        "date": menu_date.strftime("%Y-%m-%d"),
         "timezone": "America/New_York",
         "updated_at": now_eastern.strftime("%Y-%m-%d %H:%M:%S EST"),
         "status": fetched["status"],
         "message": fetched["message"],
         "source_url": fetched["source_url"],
         "sections": fetched["sections"],
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/sbu-eats-events/dental-cafe/{today.strftime('%Y-%m-%d')}",
+        "menu_url": registry.menu_url(STALL, menu_date),
     }
 
-    with open("dental_cafe.json", "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
+    return out
+
+
+def main() -> None:
+    now_eastern = eastern_now()
+    out = build_menu(now_eastern.date(), now_eastern)
 
-    print("Successfully wrote dental_cafe.json")
+    filename = registry.output_file(LOCATION_ID)
+    if menu_writer.write_location(LOCATION_ID, out):
+        print(f"Successfully wrote {filename}")
+    else:
+        print(f"{filename} unchanged, skipped write")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+import atomic_io
+
+# 全局菜名字典：id -> [规范名, 归一化 key]。id 就是列表下标，只追加、永远不变
+DISHES_PATH = "dishes.json"
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_key(name: str) -> str:
+    """去重音、小写、& -> and、非字母数字压成单个空格：'Crème  Brûlée' -> 'creme brulee'"""
+    s = unicodedata.normalize("NFKD", name)
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = s.lower().replace("&", " and ")
+    return _NON_ALNUM_RE.sub(" ", s).strip()
+
+
+def load(path: str = DISHES_PATH) -> Dict[str, Any]:
+    """
+    {"dishes": [[name, key], ...], "by_key": {key: id}}
+    by_key 只在内存里用，不写回文件。
+    """
+    dishes = (atomic_io.read_json(path) or {}).get("dishes", [])
+    return {"dishes": dishes, "by_key": {key: i for i, (_, key) in enumerate(dishes)}}
+
+
+def intern(dictionary: Dict[str, Any], name: str) -> int:
+    """名字 -> id；同一个 key 的不同写法共用第一次见到的那个名字"""
+    key = normalize_key(name)
+    dish_id = dictionary["by_key"].get(key)
+    if dish_id is None:
+        dish_id = len(dictionary["dishes"])
+        dictionary["dishes"].append([name, key])
+        dictionary["by_key"][key] = dish_id
+    return dish_id
+
+
+def _encode_items(items: List[Any], dictionary: Dict[str, Any]) -> List[Any]:
+    return [intern(dictionary, x) if isinstance(x, str) else x for x in items]
+
+
+def encode_output(out: Any, dictionary: Dict[str, Any]) -> Any:
+    """
+    把一个地点输出里所有 "items" 列表的菜名换成 dish id（不改原对象）。
+    east / west 的 meals 块、多档口的 sections、dental 的 sections 都是这个结构。
+    """
+    if isinstance(out, dict):
+        return {
+            k: _encode_items(v, dictionary) if k == "items" and isinstance(v, list) else encode_output(v, dictionary)
+            for k, v in out.items()
+        }
+    if isinstance(out, list):
+        return [encode_output(v, dictionary) for v in out]
+    return out
+
+
+def save(dictionary: Dict[str, Any], path: str = DISHES_PATH) -> Dict[str, Any]:
+    """写出字典（没变就不动文件），返回 {"file", "hash", "count"} 给 bundle / manifest 用"""
+    body = json.dumps({"dishes": dictionary["dishes"]}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    atomic_io.write_bytes_if_changed(path, body)
+    return {"file": path, "hash": hashlib.sha256(body).hexdigest()[:16], "count": len(dictionary["dishes"])}
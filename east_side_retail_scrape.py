@@ -0,0 +1,78 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import menu_writer
+import nutrislice_cache
+import nutrislice_parse
+import registry
+
+LOCATION_ID = "east_side_retail"
+
+MAX_WORKERS = 8
+
+PARSE_KEY = "east_side_retail:v2"
+
+PARSE_OPTIONS = {"header_mode": nutrislice_parse.HEADER_MODE_TEXT, "output": nutrislice_parse.OUTPUT_FLAT}
+
+# 档口列表在 locations.json 里（原来是手工维护的 east_side_retail.json）
+RETAIL_SECTIONS = registry.stalls(LOCATION_ID)
+
+
+def eastern_now() -> datetime.datetime:
+    return datetime.datetime.utcnow() - datetime.timedelta(hours=5)
+
+
+def fetch_section(s: dict, menu_date: datetime.date) -> dict:
+    use_date = registry.stall_date(s, menu_date)
+    section = {
+        "section": s["section"],
+        "status": "ok",
+        "message": "",
+        "items": [],
+        "menu_url": registry.menu_url(s, use_date),
+        "source_url": nutrislice_cache.week_url(s["school"], s["menu_type"], use_date),
+    }
+
+    try:
+        parsed = nutrislice_parse.load_parsed_day(s["school"], s["menu_type"], use_date, PARSE_KEY, PARSE_OPTIONS)
+        section.update(parsed)
+    except Exception as e:
+        section["status"] = "fetch_error"
+        section["message"] = f"Error: {e}"
+
+    return section
+
+
+def build_menu(menu_date: datetime.date, now: datetime.datetime) -> dict:
+    """menu_date 当天的输出；各档口并发读（prefetch 之后基本都是缓存命中）"""
+    out = {
+        "date": menu_date.strftime("%Y-%m-%d"),
+        "location": "East Side Retail",
+        "timezone": "America/New_York",
+        "updated_at": now.strftime("%Y-%m-%d %H:%M:%S EST"),
+        "status": "ok",
+        "sections": [],
+    }
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        out["sections"] = list(pool.map(lambda s: fetch_section(s, menu_date), RETAIL_SECTIONS))
+
+    if any(sec["status"] not in ("ok", "closed") for sec in out["sections"]):
+        out["status"] = "partial_error"
+
+    return out
+
+
+def main():
+    now = eastern_now()
+    out = build_menu(now.date(), now)
+
+    filename = registry.output_file(LOCATION_ID)
+    if menu_writer.write_location(LOCATION_ID, out):
+        print(f"Successfully wrote {filename}")
+    else:
+        print(f"{filename} unchanged, skipped write")
+
+
+if __name__ == "__main__":
+    main()
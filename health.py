@@ -0,0 +1,175 @@
+import datetime
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import atomic_io
+import menu_writer
+import registry
+import run_metrics
+
+# 一个小文件汇总所有地点 / 档口的状态，监控和页面只轮询它，不用把每个菜单文件都拉下来
+STATUS_PATH = "status.json"
+
+# 距离上次成功抓到超过这么多小时就算过期；周末没数据的地点（dental）周五到周一正好 72 小时
+STALE_AFTER_HOURS = float(os.environ.get("WOLFIE_STALE_AFTER_HOURS", "80"))
+
+# 这些才算出错；closed / no_data_today 是正常情况（周末、放假）
+ERROR_STATUSES = frozenset({"fetch_error", "partial_error", "error"})
+
+# 菜单文件看起来正常，但这次运行里该档口的请求全失败了，显示的是旧缓存里的菜单
+DEGRADED = "degraded"
+
+
+def _age_hours(iso: Optional[str], now: datetime.datetime) -> Optional[float]:
+    if not iso:
+        return None
+    try:
+        then = datetime.datetime.fromisoformat(iso)
+    except ValueError:
+        return None
+    return round((now - then).total_seconds() / 3600, 1)
+
+
+def _section_status(sec: Dict[str, Any]) -> str:
+    """老的输出文件（jasmine / east_side_retail）档口上没有 status，按有没有菜推断"""
+    if sec.get("status"):
+        return sec["status"]
+    if sec.get("type") == registry.STALL_TYPE_CHAIN:
+        return "ok"
+    return "ok" if sec.get("items") else "no_data_today"
+
+
+def _location_status(out: Dict[str, Any], stalls: List[Dict[str, Any]]) -> str:
+    statuses = [s["status"] for s in stalls]
+    status = out.get("status")
+    if not status:
+        if any(s in ERROR_STATUSES for s in statuses):
+            status = "partial_error"
+        else:
+            status = "ok" if any(s in ("ok", DEGRADED) for s in statuses) else "no_data_today"
+    if status not in ERROR_STATUSES and DEGRADED in statuses:
+        return DEGRADED
+    return status
+
+
+def _stall_requests(summary: Optional[Dict[str, Any]], stall: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """这次运行里该档口 Nutrislice 请求的汇总（run_metrics 的 requests）；没发请求（全走缓存）时为 None"""
+    if not summary or "school" not in stall or registry.stall_type(stall) != registry.STALL_TYPE_NUTRISLICE:
+        return None
+    info = summary.get("stalls", {}).get(f"{stall['school']}/{stall['menu_type']}")
+    return info["requests"] if info and info["requests"]["count"] else None
+
+
+def _all_failed(requests: Optional[Dict[str, Any]]) -> bool:
+    """发了请求而且一个都没成功：菜单是从旧缓存里来的"""
+    return requests is not None and requests["errors"] >= requests["count"]
+
+
+def location_status(
+    loc: Dict[str, Any], freshness: Dict[str, Any], summary: Optional[Dict[str, Any]], now: datetime.datetime
+) -> Dict[str, Any]:
+    out = atomic_io.read_json(loc["output"])
+    fresh = freshness.get(loc["id"]) or {}
+    source = "scraper" if loc.get("scraper") else "manual"
+    if not isinstance(out, dict):
+        return {"name": loc["name"], "status": "missing", "source": source, "stale": True, "stalls": []}
+
+    sections = {s.get("section"): s for s in out.get("sections") or [] if isinstance(s, dict)}
+    # 手工维护、registry 里没登记档口的地点，就按输出文件里的 sections 列
+    registered = loc.get("stalls") or [{"section": name} for name in sections]
+    single = len(registered) == 1
+    stalls = []
+    for stall in registered:
+        sec = sections.get(stall["section"])
+        if sec is None and single:
+            sec = out
+        requests = _stall_requests(summary, stall)
+        entry: Dict[str, Any] = {
+            "section": stall["section"],
+            "status": _section_status(sec) if sec is not None else "missing",
+            "stale": bool(sec and sec.get("stale")),
+            "latency_ms": requests["latency_ms"]["max"] if requests else None,
+        }
+        if sec is not None and sec.get("message") and entry["status"] != "ok":
+            entry["message"] = sec["message"]
+        if _all_failed(requests) and entry["status"] not in ERROR_STATUSES and entry["status"] != "missing":
+            entry["status"] = DEGRADED
+            entry["stale"] = True
+            entry["message"] = f"All {requests['count']} Nutrislice requests failed; showing the cached menu."
+        stalls.append(entry)
+
+    last_success = fresh.get("last_good_at")
+    age = _age_hours(last_success, now)
+    latencies = [s["latency_ms"] for s in stalls if s["latency_ms"] is not None]
+    result: Dict[str, Any] = {
+        "name": loc["name"],
+        "status": _location_status(out, stalls),
+        "source": source,
+        "last_success": last_success,
+        "checked_at": fresh.get("checked_at") or out.get("updated_at"),
+        "changed_at": fresh.get("changed_at"),
+        "age_hours": age,
+        "stale": bool(out.get("stale")) or any(s["status"] == DEGRADED for s in stalls),
+        "overdue": age is not None and age > STALE_AFTER_HOURS,
+        "latency_ms": max(latencies) if latencies else None,
+        "stalls": stalls,
+    }
+    if result["status"] == DEGRADED:
+        result["message"] = "Nutrislice requests failed this run; showing cached menus."
+    elif out.get("message") and result["status"] != "ok":
+        result["message"] = out["message"]
+    return result
+
+
+def build_status(summary: Optional[Dict[str, Any]] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """
+    {"generated_at", "overall": ok | degraded | down, "problems": [地点 id], "locations": {id: {...}}}
+    summary 为 run_metrics.summarize() 的结果，用来填 latency_ms，并认出请求全失败、只能用旧缓存的档口（degraded）。
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    freshness = atomic_io.read_json(menu_writer.FRESHNESS_PATH) or {}
+    locations = {loc["id"]: location_status(loc, freshness, summary, now) for loc in registry.all_locations()}
+
+    # stale 只表示正在显示上一次的菜单（周末没数据也会这样），超过 STALE_AFTER_HOURS 才算问题
+    bad = [
+        loc_id
+        for loc_id, s in locations.items()
+        if s["status"] in ERROR_STATUSES or s["status"] in ("missing", DEGRADED) or s.get("overdue")
+    ]
+    scraped = [loc_id for loc_id, s in locations.items() if s["source"] == "scraper"]
+    if not bad:
+        overall = "ok"
+    elif scraped and all(loc_id in bad for loc_id in scraped):
+        overall = "down"
+    else:
+        overall = "degraded"
+
+    return {
+        "generated_at": now.isoformat(timespec="seconds"),
+        "overall": overall,
+        "problems": bad,
+        "locations": locations,
+    }
+
+
+def last_run_summary() -> Optional[Dict[str, Any]]:
+    """metrics/last_run.jsonl 最后一行的汇总（单独运行本文件时用）"""
+    try:
+        with open(run_metrics.EVENTS_PATH, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    last = json.loads(lines[-1]) if lines else {}
+    return last if last.get("event") == "summary" else None
+
+
+def write_status(summary: Optional[Dict[str, Any]] = None, path: str = STATUS_PATH) -> Dict[str, Any]:
+    status = build_status(summary)
+    atomic_io.write_json(path, status, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    status = write_status(last_run_summary())
+    print(f"Successfully wrote {STATUS_PATH} (overall: {status['overall']})")
@@ -0,0 +1,82 @@
+import datetime
+import os
+import re
+import shutil
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+import atomic_io
+import menu_writer
+import nutrislice_cache
+import registry
+
+# 每天一个目录：menus/2026-10-17/east_dining.json ...，外加 menus/index.json
+LOOKAHEAD_DIR = os.environ.get("WOLFIE_LOOKAHEAD_DIR", "menus")
+INDEX_PATH = os.path.join(LOOKAHEAD_DIR, "index.json")
+
+_DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def lookahead_dates(today: datetime.date) -> List[datetime.date]:
+    """今天到本 Nutrislice 周（周日~周六）结束；这些天的数据都在已经抓到的那一周 payload 里"""
+    end = nutrislice_cache.week_start(today) + datetime.timedelta(days=6)
+    return [today + datetime.timedelta(days=i) for i in range((end - today).days + 1)]
+
+
+def prune_past(today: datetime.date) -> None:
+    if not os.path.isdir(LOOKAHEAD_DIR):
+        return
+    for name in os.listdir(LOOKAHEAD_DIR):
+        if _DATE_DIR_RE.match(name) and name < today.isoformat():
+            shutil.rmtree(os.path.join(LOOKAHEAD_DIR, name), ignore_errors=True)
+
+
+def nothing_fetched(out: Dict[str, Any]) -> bool:
+    """整个地点没数据，或者多档口地点里每个非 chain 档口都失败了（后者顶层只报 partial_error）"""
+    if out.get("status") in menu_writer.STALE_STATUSES:
+        return True
+    fetched = [
+        s for s in out.get("sections") or [] if isinstance(s, dict) and s.get("type") != registry.STALL_TYPE_CHAIN
+    ]
+    return bool(fetched) and all(s.get("status") in menu_writer.STALE_STATUSES for s in fetched)
+
+
+def write_lookahead(now: datetime.datetime) -> Dict[str, Any]:
+    """
+    用各 scraper 的 build_menu 把本周剩下每一天都生成一份，写到 menus/<日期>/ 下。
+    读的都是刚抓好的缓存，不会多发请求。某天什么都没抓到就不写，已有的那天的文件原样保留；
+    个别档口失败时和今天的菜单一样，用那天文件里上一次的版本兜底（menu_writer.keep_last_good）。
+    返回写进 menus/index.json 的索引。
+    """
+    today = now.date()
+    dates = lookahead_dates(today)
+    files: Dict[str, Dict[str, str]] = {d.isoformat(): {} for d in dates}
+
+    for loc in registry.all_locations():
+        build = registry.builder(loc)
+        if build is None:
+            continue
+        for d in dates:
+            out = build(d, now)
+            path = os.path.join(LOOKAHEAD_DIR, d.isoformat(), loc["output"])
+            prev = atomic_io.read_json(path)
+            if nothing_fetched(out):
+                if not isinstance(prev, dict):
+                    continue
+            else:
+                menu_writer.write_menu_file(path, menu_writer.keep_last_good(out, prev, None))
+            files[d.isoformat()][loc["data_key"]] = path.replace(os.sep, "/")
+
+    prune_past(today)
+
+    index = {
+        "today": today.isoformat(),
+        "dates": [{"date": date_str, "files": f} for date_str, f in files.items() if f],
+    }
+    atomic_io.write_json(INDEX_PATH, index, indent=2)
+    return index
+
+
+if __name__ == "__main__":
+    index = write_lookahead(datetime.datetime.now(ZoneInfo("America/New_York")))
+    print(f"Successfully wrote {INDEX_PATH} ({len(index['dates'])} dates)")
@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import nutrislice_parse
+
+# East / West 共用的餐段规则：按 section 名里的关键词决定这个档口的菜放进哪些餐段。
+# 一个 section 命中多条规则时，排在前面的规则优先（'Breakfast Pizza' 算 pizza）。
+MEAL_RULES = [
+    # pizza / pasta 档口全天都开
+    {"pattern": r"\bpizza\b|\bpasta\b", "weekday": ["lunch", "dinner", "late_night"], "weekend": ["brunch", "dinner"]},
+    {"pattern": r"\blate\s*night\b", "meals": ["late_night"]},
+    {"pattern": r"\bbreakfast\b", "meals": ["breakfast"]},
+    {"pattern": r"\blunch\b", "meals": ["lunch"]},
+    {"pattern": r"\bdinner\b", "meals": ["dinner"]},
+]
+
+# 什么都没命中
+DEFAULT_MEALS = ["dinner"]
+
+# 周末把 late night 并进 dinner 时要改名的档口
+SECTION_RENAMES = {"late_night": {"Late Night Specials": "Grill Dinner Specials"}}
+
+# 规则表的指纹；scraper 把它拼进 PARSE_KEY，改了规则解析缓存自动失效
+RULES_KEY = hashlib.sha1(
+    json.dumps([MEAL_RULES, DEFAULT_MEALS, SECTION_RENAMES], sort_keys=True).encode("utf-8")
+).hexdigest()[:8]
+
+# {meal: {section: [菜名]}}：parse_day 分好餐段、还没排序去重的中间结果
+MealsMap = Dict[str, Dict[str, List[str]]]
+
+# [{"section", "items"}, ...]：输出里每个餐段下的档口
+Blocks = List[Dict[str, Any]]
+
+# 所有规则合成一个正则，每条规则是一个命名分组 r0, r1, ...
+_COMBINED_RE = re.compile("|".join(f"(?P<r{i}>{rule['pattern']})" for i, rule in enumerate(MEAL_RULES)), re.I)
+
+
+def _rule_meals(rule: dict, is_weekend: bool) -> Tuple[str, ...]:
+    if "meals" in rule:
+        return tuple(rule["meals"])
+    return tuple(rule["weekend"] if is_weekend else rule["weekday"])
+
+
+@functools.lru_cache(maxsize=4096)
+def meals_for_section(section_name: Optional[str], is_weekend: bool) -> Tuple[str, ...]:
+    """
+    section 属于哪些餐段 (e.g. 'Grill Lunch' -> ('lunch',))。
+    一次扫描拿到所有命中的规则，取最靠前的一条；同一个 section 名只算一次。
+    """
+    hits = [int(m.lastgroup[1:]) for m in _COMBINED_RE.finditer(section_name or "")]
+    if not hits:
+        return tuple(DEFAULT_MEALS)
+    return _rule_meals(MEAL_RULES[min(hits)], is_weekend)
+
+
+def rename_section(meal: str, section: str) -> str:
+    return SECTION_RENAMES.get(meal, {}).get(section, section)
+
+
+def meals_map_to_output(meals_map: MealsMap, meal_order: List[str]) -> Dict[str, Blocks]:
+    """按 meal_order 给出每个餐段（没有菜的也给空列表），section 按名字排序、菜名去重"""
+    out = {}
+    for meal in meal_order:
+        blocks = [
+            {"section": sec, "items": nutrislice_parse.dedupe_preserve_order(names)}
+            for sec, names in meals_map.get(meal, {}).items()
+        ]
+        blocks.sort(key=lambda x: (x["section"] or "").lower())
+        out[meal] = blocks
+    return out
+
+
+def merge_blocks(blocks: Blocks) -> Blocks:
+    """合并同名 Section 的菜品列表"""
+    sec_map: Dict[str, List[str]] = {}
+    for b in blocks:
+        s = b.get("section") or "Other"
+        sec_map.setdefault(s, []).extend(b.get("items") or [])
+
+    merged = [{"section": s, "items": nutrislice_parse.dedupe_preserve_order(items)} for s, items in sec_map.items()]
+    merged.sort(key=lambda x: (x["section"] or "").lower())
+    return merged
+
+
+def weekend_merge_brunch_dinner(base: Dict[str, Blocks]) -> Dict[str, Blocks]:
+    """
+    周末特殊逻辑：
+    Brunch = Breakfast + Lunch
+    Dinner = Dinner + Late Night (重命名 Late Night Grill -> Grill Dinner)
+    """
+    # 1. Brunch
+    brunch = merge_blocks(base.get("breakfast", []) + base.get("lunch", []) + base.get("brunch", []))
+
+    # 2. Dinner
+    dinner_blocks = list(base.get("dinner", []))
+    for b in base.get("late_night", []):
+        sec = b.get("section") or "Other"
+        renamed = rename_section("late_night", sec)
+        if renamed != sec:
+            dinner_blocks.append({"section": renamed, "items": b.get("items") or []})
+        else:
+            dinner_blocks.append(b)
+
+    return {"brunch": brunch, "dinner": merge_blocks(dinner_blocks)}
+
+
+def build_meals(meals_map: MealsMap, is_weekend: bool) -> Dict[str, Blocks]:
+    """East / West 输出里的 meals：平日四个餐段，周末 brunch + dinner"""
+    if is_weekend:
+        base = meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night", "brunch"])
+        return weekend_merge_brunch_dinner(base)
+    return meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night"])
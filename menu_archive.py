@@ -0,0 +1,270 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import atomic_io
+import registry
+
+# 每天每个地点的菜品都追加进来；用来回答“East 一年出过几次 Belgian Waffles”这类问题
+# 每天都在变，不进 git：CI 里放在 Actions cache，丢了就用 backfill 从 git 历史重建
+ARCHIVE_PATH = os.environ.get("WOLFIE_ARCHIVE", os.path.join("archive", "menus.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    date TEXT NOT NULL,
+    location TEXT NOT NULL,
+    meal TEXT NOT NULL DEFAULT '',
+    section_id INTEGER NOT NULL REFERENCES sections(id),
+    item_id INTEGER NOT NULL REFERENCES items(id),
+    PRIMARY KEY (date, location, meal, section_id, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_appearances_item ON appearances (item_id, date);
+CREATE INDEX IF NOT EXISTS idx_appearances_location_date ON appearances (location, date);
+"""
+
+# backfill 按提交时间算菜单日期用的时区
+NY_TZ = ZoneInfo("America/New_York")
+
+# (date, meal, section, item)
+Row = Tuple[str, str, str, str]
+
+
+def connect(path: str = ARCHIVE_PATH) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _usable(block: Dict[str, Any], include_stale: bool = False) -> bool:
+    """
+    默认只收这次真的抓到的菜：stale 的（沿用上一次的）和出错的都不算。
+    include_stale=True 时沿用上一次的也收（页面上照样显示它们）。
+    """
+    if include_stale and block.get("stale"):
+        return True
+    return not block.get("stale") and block.get("status", "ok") in ("ok", "partial_error")
+
+
+def rows_from_output(out: Dict[str, Any], menu_date: str, include_stale: bool = False) -> Iterator[Row]:
+    """
+    把一个地点的输出 JSON 摊平成 (date, meal, section, item)。
+    有顶层 date 的（east / west / dental / jasmine）用它；sac / roth 没有就用 menu_date。
+    chain 档口只是官方菜单链接，不算。
+    """
+    if not isinstance(out, dict) or not _usable(out, include_stale):
+        return
+    date_str = out.get("date") or menu_date
+
+    for meal, blocks in (out.get("meals") or {}).items():
+        for b in blocks or []:
+            for item in b.get("items") or []:
+                yield date_str, meal, b.get("section") or "", item
+
+    for sec in out.get("sections") or []:
+        if not isinstance(sec, dict) or sec.get("type") == "chain" or not _usable(sec, include_stale):
+            continue
+        for item in sec.get("items") or []:
+            yield date_str, "", sec.get("section") or "", item
+
+
+def add_rows(conn: sqlite3.Connection, location_id: str, rows: List[Row]) -> int:
+    """追加（重复的直接忽略），返回新增行数"""
+    if not rows:
+        return 0
+    names = {r[3] for r in rows}
+    section_names = {r[2] for r in rows}
+    conn.executemany("INSERT OR IGNORE INTO items (name) VALUES (?)", [(n,) for n in names])
+    conn.executemany("INSERT OR IGNORE INTO sections (name) VALUES (?)", [(n,) for n in section_names])
+    item_ids = dict(conn.execute("SELECT name, id FROM items"))
+    section_ids = dict(conn.execute("SELECT name, id FROM sections"))
+
+    before = conn.total_changes
+    conn.executemany(
+        "INSERT OR IGNORE INTO appearances (date, location, meal, section_id, item_id) VALUES (?, ?, ?, ?, ?)",
+        [(d, location_id, meal, section_ids[sec], item_ids[item]) for d, meal, sec, item in rows],
+    )
+    return conn.total_changes - before
+
+
+def archive_current(menu_date: datetime.date, path: str = ARCHIVE_PATH) -> int:
+    """把当前各地点输出文件里的菜记进 archive（每次运行结束时调用）"""
+    conn = connect(path)
+    added = 0
+    with conn:
+        for loc in registry.all_locations():
+            out = atomic_io.read_json(loc["output"])
+            if out is not None:
+                added += add_rows(conn, loc["id"], list(rows_from_output(out, menu_date.isoformat())))
+    conn.close()
+    return added
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True, encoding="utf-8").stdout
+
+
+def _git_blobs(specs: List[str]) -> List[Optional[bytes]]:
+    """一个 git cat-file --batch 进程读出所有 '<sha>:<path>'，不存在的为 None"""
+    if not specs:
+        return []
+    raw = subprocess.run(
+        ["git", "cat-file", "--batch"], input=("\n".join(specs) + "\n").encode("utf-8"), check=True, capture_output=True
+    ).stdout
+    out: List[Optional[bytes]] = []
+    pos = 0
+    for _ in specs:
+        eol = raw.index(b"\n", pos)
+        header = raw[pos:eol].split()
+        pos = eol + 1
+        if len(header) != 3:  # "<spec> missing"
+            out.append(None)
+            continue
+        size = int(header[2])
+        out.append(raw[pos : pos + size])
+        pos += size + 1
+    return out
+
+
+def backfill(path: str = ARCHIVE_PATH, since: Optional[str] = None) -> int:
+    """
+    沿 git 历史把每个地点输出文件的每个版本都导入一遍。
+    没有顶层 date 的文件用提交日期（纽约时间）当菜单日期。
+    """
+    conn = connect(path)
+    added = 0
+    for loc in registry.all_locations():
+        log_args = ["log", "--format=%H %cI"]
+        if since:
+            log_args.append(f"--since={since}")
+        commits = _git(*log_args, "--", loc["output"]).split()
+        shas, dates = commits[0::2], commits[1::2]
+        blobs = _git_blobs([f"{sha}:{loc['output']}" for sha in shas])
+        rows: List[Row] = []
+        for blob, committed in zip(blobs, dates):
+            if blob is None:
+                continue
+            try:
+                out = json.loads(blob)
+            except ValueError:
+                continue
+            commit_date = datetime.datetime.fromisoformat(committed).astimezone(NY_TZ).date().isoformat()
+            rows.extend(rows_from_output(out, commit_date))
+        with conn:
+            n = add_rows(conn, loc["id"], rows)
+        print(f"[{loc['id']}] {len(shas)} versions, {n} new rows")
+        added += n
+    conn.close()
+    return added
+
+
+def item_history(conn: sqlite3.Connection, pattern: str, location: Optional[str] = None) -> List[Tuple]:
+    """(item, location, 出现天数, 第一次, 最近一次)；pattern 是不区分大小写的子串"""
+    sql = """
+        SELECT i.name, a.location, COUNT(DISTINCT a.date), MIN(a.date), MAX(a.date)
+        FROM items i JOIN appearances a ON a.item_id = i.id
+        WHERE i.name LIKE ?
+    """
+    params: List[Any] = [f"%{pattern}%"]
+    if location:
+        sql += " AND a.location = ?"
+        params.append(location)
+    sql += " GROUP BY i.id, a.location ORDER BY COUNT(DISTINCT a.date) DESC"
+    return conn.execute(sql, params).fetchall()
+
+
+def menu_on(conn: sqlite3.Connection, date_str: str, location: Optional[str] = None) -> List[Tuple]:
+    sql = """
+        SELECT a.location, a.meal, s.name, i.name
+        FROM appearances a
+        JOIN items i ON i.id = a.item_id
+        JOIN sections s ON s.id = a.section_id
+        WHERE a.date = ?
+    """
+    params: List[Any] = [date_str]
+    if location:
+        sql += " AND a.location = ?"
+        params.append(location)
+    sql += " ORDER BY a.location, a.meal, s.name, i.name"
+    return conn.execute(sql, params).fetchall()
+
+
+def top_items(conn: sqlite3.Connection, location: Optional[str] = None, limit: int = 20) -> List[Tuple]:
+    sql = """
+        SELECT i.name, COUNT(DISTINCT a.date || a.location) AS n
+        FROM appearances a JOIN items i ON i.id = a.item_id
+    """
+    params: List[Any] = []
+    if location:
+        sql += " WHERE a.location = ?"
+        params.append(location)
+    sql += " GROUP BY i.id ORDER BY n DESC, i.name LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the Wolfie Dine menu archive.")
+    parser.add_argument("--db", default=ARCHIVE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("item", help="how often an item appeared")
+    p.add_argument("name")
+    p.add_argument("--location")
+
+    p = sub.add_parser("date", help="everything served on a date")
+    p.add_argument("date")
+    p.add_argument("--location")
+
+    p = sub.add_parser("top", help="most frequent items")
+    p.add_argument("--location")
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("backfill", help="import every committed version of the menu files")
+    p.add_argument("--since")
+
+    sub.add_parser("add", help="archive the current menu files")
+
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+
+    if args.command == "backfill":
+        print(f"Added {backfill(args.db, args.since)} rows")
+    elif args.command == "add":
+        print(f"Added {archive_current(datetime.date.today(), args.db)} rows")
+    else:
+        conn = connect(args.db)
+        if args.command == "item":
+            for name, loc, days, first, last in item_history(conn, args.name, args.location):
+                print(f"{name} @ {loc}: {days} days ({first} .. {last})")
+        elif args.command == "date":
+            for loc, meal, section, name in menu_on(conn, args.date, args.location):
+                print(f"{loc}\t{meal or '-'}\t{section}\t{name}")
+        else:
+            for name, n in top_items(conn, args.location, args.limit):
+                print(f"{n:6d}  {name}")
+        conn.close()
+
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import atomic_io
+import registry
+
+# 每次运行各地点相对上一次的增量；客户端手里的 seq 落后不多时按顺序打补丁，不用重新拉整份菜单
+CHANGES_PATH = "changes.json"
+
+# 保留最近这么多次有变化的运行
+CHANGES_KEEP = int(os.environ.get("WOLFIE_CHANGES_KEEP", "7"))
+
+# 这些顶层字段的变化不算（updated_at 每次都变）
+_IGNORED_FIELDS = frozenset({"updated_at", "meals", "sections"})
+
+# 块的身份和菜单本身，单独比
+_BLOCK_KEYS = frozenset({"section", "items"})
+
+_pending: Dict[str, Dict[str, Any]] = {}
+_pending_lock = threading.Lock()
+
+
+def _blocks(out: Optional[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """{(meal, section): 块}；east / west 的 meals 块 meal 为餐段，sections 结构的 meal 为 ''"""
+    if not isinstance(out, dict):
+        return {}
+    blocks: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for meal, bs in (out.get("meals") or {}).items():
+        for b in bs or []:
+            if isinstance(b, dict):
+                blocks[(meal, b.get("section") or "")] = b
+    for sec in out.get("sections") or []:
+        if isinstance(sec, dict):
+            blocks[("", sec.get("section") or "")] = sec
+    return blocks
+
+
+def diff_outputs(prev: Optional[Dict[str, Any]], out: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {"fields": {变了的顶层字段: 新值}, "changes": [{"meal", "section", "added", "removed", "fields"}]}
+    meal 为空的不写；section 整个消失时它的菜全在 removed 里；块上 status / stale 之类变了放进该块的 fields。
+    """
+    prev = prev if isinstance(prev, dict) else {}
+    fields = {
+        k: out.get(k)
+        for k in sorted(set(prev) | set(out))
+        if k not in _IGNORED_FIELDS and prev.get(k) != out.get(k)
+    }
+
+    old_blocks, new_blocks = _blocks(prev), _blocks(out)
+    changes: List[Dict[str, Any]] = []
+    for key in list(new_blocks) + [k for k in old_blocks if k not in new_blocks]:
+        old, new = old_blocks.get(key) or {}, new_blocks.get(key) or {}
+        old_items, new_items = old.get("items") or [], new.get("items") or []
+        old_set, new_set = set(map(str, old_items)), set(map(str, new_items))
+        entry: Dict[str, Any] = {"section": key[1]}
+        if key[0]:
+            entry["meal"] = key[0]
+        added = [x for x in new_items if str(x) not in old_set]
+        removed = [x for x in old_items if str(x) not in new_set]
+        if added:
+            entry["added"] = added
+        if removed:
+            entry["removed"] = removed
+        block_fields = {
+            k: new.get(k) for k in sorted(set(old) | set(new)) if k not in _BLOCK_KEYS and old.get(k) != new.get(k)
+        }
+        if block_fields:
+            entry["fields"] = block_fields
+        if len(entry) > (2 if key[0] else 1):
+            changes.append(entry)
+
+    result: Dict[str, Any] = {}
+    if fields:
+        result["fields"] = fields
+    if changes:
+        result["changes"] = changes
+    return result
+
+
+def record(location_id: str, prev: Optional[Dict[str, Any]], out: Dict[str, Any], prev_hash: Optional[str],
+           new_hash: str) -> None:
+    """menu_writer 真正重写一个地点时调用；from / to 是前后的内容 hash，客户端据此确认补丁能不能打"""
+    delta = {"from": prev_hash, "to": new_hash, **diff_outputs(prev, out)}
+    key = registry.location(location_id)["data_key"]
+    with _pending_lock:
+        _pending[key] = delta
+
+
+def pending() -> Dict[str, Dict[str, Any]]:
+    with _pending_lock:
+        return dict(_pending)
+
+
+def write_changes(path: str = CHANGES_PATH) -> Dict[str, Any]:
+    """
+    这次运行有地点变了就把 seq 加一、追加一条 run；没变不动文件。
+    {"seq": 最新序号, "runs": [{"seq", "generated_at", "locations": {data_key: delta}}, ...]}
+    返回 {"file", "seq", "hash"} 给 manifest；这次变了哪些地点只写在 changes.json 里。
+    """
+    doc = atomic_io.read_json(path) or {}
+    runs = doc.get("runs") or []
+    seq = doc.get("seq", 0)
+
+    with _pending_lock:
+        locations = dict(sorted(_pending.items()))
+        _pending.clear()
+
+    if locations:
+        seq += 1
+        runs = runs[max(0, len(runs) - CHANGES_KEEP + 1) :] + [
+            {
+                "seq": seq,
+                "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "locations": locations,
+            }
+        ]
+        body = json.dumps({"seq": seq, "runs": runs}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        atomic_io.write_bytes(path, body)
+    else:
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            body = b""
+
+    return {"file": path, "seq": seq, "hash": hashlib.sha256(body).hexdigest()[:16]}
@@ -0,0 +1,149 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import atomic_io
+import menu_changes
+import nutrislice_cache
+import registry
+import run_metrics
+
+# 只表示“什么时候跑的”的字段；算内容 hash 时去掉，避免每次运行都重写文件
+VOLATILE_KEYS = frozenset({"updated_at"})
+
+# 每个地点最近一次检查 / 内容变化的时间单独放在这里，菜单文件本身内容不变就不动
+FRESHNESS_PATH = "freshness.json"
+
+# 这两种状态不覆盖上一次的好菜单，而是沿用它并标记 stale
+STALE_STATUSES = frozenset({"fetch_error", "no_data_today"})
+
+_freshness_lock = threading.Lock()
+
+
+def _utc_now_iso() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def content_hash(out: Dict[str, Any]) -> str:
+    """去掉时间戳后的规范化 JSON (sort_keys, 无空白) 的 sha256"""
+    content = {k: v for k, v in out.items() if k not in VOLATILE_KEYS}
+    canonical = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _usable(block: Any) -> bool:
+    """上一次写的东西能不能拿来兜底：本身是好的，或者本身就是兜底出来的"""
+    return isinstance(block, dict) and (block.get("status") not in STALE_STATUSES or bool(block.get("stale")))
+
+
+def keep_last_good(
+    out: Dict[str, Any], prev: Optional[Dict[str, Any]], last_good_at: Optional[str]
+) -> Dict[str, Any]:
+    """
+    整个地点 fetch_error / no_data_today：沿用上次的内容，status / message 用这次的，
+    加 stale=True 和 last_good_at（前端据此算出菜单有多旧）。
+    只是个别档口失败：只把这些档口换成上次的版本并标 stale。
+    没有可用的上一次时原样返回 out。
+    """
+    if out.get("status") in STALE_STATUSES:
+        if not _usable(prev):
+            return out
+        return {
+            **prev,
+            "status": out["status"],
+            "message": out.get("message", ""),
+            "updated_at": out.get("updated_at"),
+            "stale": True,
+            "last_good_at": last_good_at,
+        }
+
+    sections = out.get("sections")
+    if not isinstance(sections, list) or not isinstance(prev, dict):
+        return out
+
+    prev_sections = {
+        s.get("section"): s for s in prev.get("sections") or [] if isinstance(s, dict) and s.get("items")
+    }
+    merged = []
+    for sec in sections:
+        old = prev_sections.get(sec.get("section"))
+        if sec.get("status") in STALE_STATUSES and _usable(old):
+            sec = {**old, "status": sec["status"], "message": sec.get("message", ""), "stale": True}
+        merged.append(sec)
+    return {**out, "sections": merged}
+
+
+def _fetched(location_id: str) -> bool:
+    """
+    这次运行里至少有一个 Nutrislice 档口真的拿到了数据（200 / 304，或者缓存还在 REVALIDATE_AFTER 之内）。
+    全部退回旧缓存时菜单看起来正常，但不能算一次成功。
+    """
+    stalls = [s for s in registry.stalls(location_id) if registry.stall_type(s) == registry.STALL_TYPE_NUTRISLICE]
+    return not stalls or any(not nutrislice_cache.fell_back(s["school"], s["menu_type"]) for s in stalls)
+
+
+def record_freshness(location_id: str, checked_at: Optional[str], digest: str, changed: bool, good: bool) -> None:
+    with _freshness_lock:
+        freshness = atomic_io.read_json(FRESHNESS_PATH) or {}
+        prev = freshness.get(location_id) or {}
+        freshness[location_id] = {
+            "checked_at": checked_at,
+            "changed_at": checked_at if changed else prev.get("changed_at", checked_at),
+            "content_hash": digest,
+            "last_good_at": _utc_now_iso() if good else prev.get("last_good_at"),
+        }
+        atomic_io.write_json(FRESHNESS_PATH, freshness, indent=2, sort_keys=True)
+
+
+def last_good_at(location_id: str) -> Optional[str]:
+    with _freshness_lock:
+        freshness = atomic_io.read_json(FRESHNESS_PATH) or {}
+    return (freshness.get(location_id) or {}).get("last_good_at")
+
+
+def write_menu_file(path: str, out: Dict[str, Any]) -> bool:
+    """原子写出任意一个菜单文件；内容（除 updated_at 之外）没变就不写，返回是否写了"""
+    prev = atomic_io.read_json(path)
+    if isinstance(prev, dict) and content_hash(prev) == content_hash(out):
+        return False
+    atomic_io.write_json(path, out, indent=2)
+    return True
+
+
+def write_location(location_id: str, out: Dict[str, Any]) -> bool:
+    """
+    原子地写出一个地点的菜单，返回是否真的写了：
+      - 抓取失败 / 当天没数据时沿用上一次的好菜单（见 keep_last_good）
+      - 内容（除 updated_at 之外）和上次一样就不重写
+    不管写没写，都在 freshness.json 里记下这次检查。
+    """
+    start = time.perf_counter()
+    path = registry.output_file(location_id)
+    prev = atomic_io.read_json(path)
+    if not isinstance(prev, dict):
+        prev = None
+
+    good = out.get("status") not in STALE_STATUSES and _fetched(location_id)
+    out = keep_last_good(out, prev, last_good_at(location_id))
+
+    digest = content_hash(out)
+    prev_digest = content_hash(prev) if prev is not None else None
+    changed = prev_digest != digest
+
+    if changed:
+        atomic_io.write_json(path, out, indent=2)
+        menu_changes.record(location_id, prev, out, prev_digest, digest)
+
+    record_freshness(location_id, out.get("updated_at"), digest, changed, good)
+    run_metrics.record(
+        "write",
+        location=location_id,
+        status=out.get("status"),
+        changed=changed,
+        items=run_metrics.count_items(out),
+        ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+    return changed
@@ -0,0 +1,289 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import atomic_io
+import nutrislice_http
+import nutrislice_stream
+import run_metrics
+
+# 指向本地替身服务器 (python nutrislice_replay.py serve) 时可以完全离线跑
+API_BASE = os.environ.get("NUTRISLICE_API_BASE", "https://stonybrook.api.nutrislice.com")
+
+API_PATH = "/menu/api/weeks/school/{school}/menu-type/{menu_type}/{year}/{month}/{day}/?format=json"
+
+CACHE_DIR = os.environ.get("NUTRISLICE_CACHE_DIR", os.path.join(".cache", "nutrislice"))
+
+# 缓存在这个时间内直接用，不发请求；超过后发条件请求 (ETag / If-Modified-Since) 重新验证
+REVALIDATE_AFTER = float(os.environ.get("NUTRISLICE_REVALIDATE_AFTER", str(12 * 3600)))
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# 这次运行里请求失败过的周：cache 路径 -> 错误。同一次运行里不再请求（重试 + backoff 在 prefetch 时已经走过一遍），
+# 有旧缓存就用旧缓存，没有就直接报上次的错；下次运行（新进程）再去验证
+_failed: Dict[str, str] = {}
+
+
+def week_url(school: str, menu_type: str, date_obj: datetime.date) -> str:
+    return (API_BASE.rstrip("/") + API_PATH).format(
+        school=school,
+        menu_type=menu_type,
+        year=date_obj.year,
+        month=f"{date_obj.month:02d}",
+        day=f"{date_obj.day:02d}",
+    )
+
+
+def week_key(date_obj: datetime.date) -> str:
+    """
+    Nutrislice 的一周是 周日~周六；+1 天后取 ISO 周，
+    这样同一个 Nutrislice 周里的每一天都落在同一个 key 上 (e.g. '2026-W42')。
+    """
+    iso = (date_obj + datetime.timedelta(days=1)).isocalendar()
+    return f"{iso[0]}-W{iso[1]:02d}"
+
+
+def week_start(date_obj: datetime.date) -> datetime.date:
+    """该日期所在 Nutrislice 周的周日"""
+    return date_obj - datetime.timedelta(days=(date_obj.weekday() + 1) % 7)
+
+
+def cache_path(school: str, menu_type: str, date_obj: datetime.date) -> str:
+    return os.path.join(CACHE_DIR, school, menu_type, f"{week_key(date_obj)}.json")
+
+
+def _meta_path(path: str) -> str:
+    return path[: -len(".json")] + ".meta.json"
+
+
+def _parsed_path(path: str) -> str:
+    return path[: -len(".json")] + ".parsed.json"
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _write_json(path: str, obj: Any) -> None:
+    atomic_io.write_json(path, obj, separators=(",", ":"))
+
+
+def _download(r: Any, path: str) -> Tuple[str, Dict[str, list]]:
+    """
+    边下载边写盘边扫描：body 不整体留在内存里，同时记下每一天在文件里的位置。
+    返回 (sha1, {date: [偏移, 长度]})；body 不完整会抛异常，旧缓存保持不变。
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{threading.get_ident()}"
+    sha = hashlib.sha1()
+
+    try:
+        with open(tmp, "wb") as f:
+
+            def tee():
+                for chunk in r.iter_content(nutrislice_stream.CHUNK_SIZE):
+                    sha.update(chunk)
+                    f.write(chunk)
+                    yield chunk
+
+            days = nutrislice_stream.index_days(tee())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        r.close()
+
+    return sha.hexdigest(), days
+
+
+def _validated_week(school: str, menu_type: str, date_obj: datetime.date) -> Tuple[str, Dict[str, Any]]:
+    """
+    确保磁盘上有这一周的 payload，并返回 (cache 路径, meta)。
+    meta 里存 ETag / Last-Modified，过期后发条件请求；304 时不下载、不解析。
+    条件请求失败（Nutrislice 挂了）时，只要磁盘上有旧缓存就退回旧缓存，只在 metrics 里记一次失败；
+    失败记进 _failed，这次运行里每周最多请求一次。
+    调用方需持有该路径的锁。
+    """
+    path = cache_path(school, menu_type, date_obj)
+    meta = atomic_io.read_json(_meta_path(path)) if os.path.exists(path) else None
+
+    if meta and time.time() - meta.get("checked_at", 0) < REVALIDATE_AFTER:
+        return path, meta
+    if path in _failed:
+        if meta:
+            return path, meta
+        raise RuntimeError(f"{week_url(school, menu_type, date_obj)} failed earlier in this run: {_failed[path]}")
+
+    # 不用 meta 里记的 url：换了 API_BASE 之后要去新的地址重新验证
+    url = week_url(school, menu_type, date_obj)
+    headers: Dict[str, str] = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    start = time.perf_counter()
+    try:
+        r = nutrislice_http.get(url, headers=headers, stream=True)
+    except Exception as e:
+        response = getattr(e, "response", None)
+        _record_request(
+            school, menu_type, url, start, getattr(response, "status_code", None), 0, getattr(e, "retries", 0), str(e)
+        )
+        _failed[path] = str(e)
+        # 重新验证失败但磁盘上有完整的旧缓存：先用旧的（checked_at 不动，下次运行再验证）
+        if meta:
+            return path, meta
+        raise
+
+    if r.status_code == 304 and meta:
+        r.close()
+        meta["checked_at"] = time.time()
+        _write_json(_meta_path(path), meta)
+        _record_request(school, menu_type, url, start, r.status_code, 0, r.retries)
+        return path, meta
+
+    try:
+        version, days = _download(r, path)
+    except Exception as e:
+        _record_request(school, menu_type, url, start, r.status_code, 0, r.retries, str(e))
+        _failed[path] = str(e)
+        # _download 失败时旧缓存原样留着
+        if meta:
+            return path, meta
+        raise
+    _record_request(school, menu_type, url, start, r.status_code, os.path.getsize(path), r.retries)
+    meta = {
+        "url": url,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+        "version": version,
+        "days": days,
+    }
+    _write_json(_meta_path(path), meta)
+    return path, meta
+
+
+def _record_request(
+    school: str,
+    menu_type: str,
+    url: str,
+    start: float,
+    status: Optional[int],
+    size: int,
+    retries: int,
+    error: Optional[str] = None,
+) -> None:
+    """latency 包括重试和把 body 下载完的时间"""
+    fields: Dict[str, Any] = {
+        "school": school,
+        "menu_type": menu_type,
+        "url": url,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "bytes": size,
+        "retries": retries,
+    }
+    if error is not None:
+        fields["error"] = error
+    run_metrics.record("request", **fields)
+
+
+def _read_day(
+    path: str, meta: Dict[str, Any], date_str: str, fields: Optional[frozenset]
+) -> Optional[Dict[str, Any]]:
+    """按下载时记下的偏移只解码这一天；老缓存没有偏移时退回流式扫描"""
+    days = meta.get("days")
+    if days is None:
+        return nutrislice_stream.find_day_in_file(path, date_str, fields)
+    span = days.get(date_str)
+    if span is None:
+        return None
+    return nutrislice_stream.read_day(path, span, fields)
+
+
+def fell_back(school: str, menu_type: str) -> bool:
+    """这次运行里该档口有一周请求失败（用的是旧缓存，或者没有缓存直接报错）"""
+    prefix = os.path.join(CACHE_DIR, school, menu_type, "")
+    return any(p.startswith(prefix) for p in list(_failed))
+
+
+def prefetch_week(school: str, menu_type: str, date_obj: datetime.date) -> None:
+    """只确保这一周在磁盘上是新的（必要时下载 / 条件请求），不解码"""
+    path = cache_path(school, menu_type, date_obj)
+    with _lock_for(path):
+        _validated_week(school, menu_type, date_obj)
+
+
+def get_day(
+    school: str,
+    menu_type: str,
+    date_obj: datetime.date,
+    fields: Optional[frozenset] = nutrislice_stream.MENU_FIELDS,
+) -> Optional[Dict[str, Any]]:
+    """单日的 day block（没有就返回 None）；fields=None 保留全部字段"""
+    path = cache_path(school, menu_type, date_obj)
+    with _lock_for(path):
+        path, meta = _validated_week(school, menu_type, date_obj)
+        return _read_day(path, meta, date_obj.strftime("%Y-%m-%d"), fields)
+
+
+def _record_parse(
+    school: str, menu_type: str, date_str: str, parse_key: str, start: Optional[float], result: Any
+) -> None:
+    """start 为 None 表示命中了解析缓存"""
+    run_metrics.record(
+        "parse",
+        school=school,
+        menu_type=menu_type,
+        date=date_str,
+        parse_key=parse_key,
+        cached=start is None,
+        ms=0 if start is None else round((time.perf_counter() - start) * 1000, 2),
+        items=run_metrics.count_items(result),
+    )
+
+
+def load_day(
+    school: str,
+    menu_type: str,
+    date_obj: datetime.date,
+    parse: Callable[[Optional[Dict[str, Any]]], Any],
+    parse_key: str,
+) -> Any:
+    """
+    取某天的 day block 并用 parse 解析，结果按 (parse_key, 日期, payload 版本) 缓存。
+    payload 没变（缓存命中或 304）时直接返回上次的解析结果，连 JSON 都不用解码；
+    否则只解码这一天、只保留菜单用到的字段。
+    parse 的输出逻辑改了的话要换 parse_key。
+    """
+    path = cache_path(school, menu_type, date_obj)
+    date_str = date_obj.strftime("%Y-%m-%d")
+    slot = f"{parse_key}|{date_str}"
+
+    with _lock_for(path):
+        path, meta = _validated_week(school, menu_type, date_obj)
+
+        parsed = atomic_io.read_json(_parsed_path(path)) or {}
+        if parsed.get("version") != meta["version"]:
+            parsed = {"version": meta["version"], "results": {}}
+        elif slot in parsed["results"]:
+            result = parsed["results"][slot]
+            _record_parse(school, menu_type, date_str, parse_key, None, result)
+            return result
+
+        start = time.perf_counter()
+        result = parse(_read_day(path, meta, date_str, nutrislice_stream.MENU_FIELDS))
+        _record_parse(school, menu_type, date_str, parse_key, start, result)
+
+        parsed["results"][slot] = result
+        _write_json(_parsed_path(path), parsed)
+        return result
@@ -0,0 +1,105 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# 可通过环境变量调整，方便 CI / 本地调试
+POOL_SIZE = int(os.environ.get("NUTRISLICE_POOL_SIZE", "16"))
+MAX_RETRIES = int(os.environ.get("NUTRISLICE_RETRIES", "3"))
+BACKOFF_BASE = float(os.environ.get("NUTRISLICE_BACKOFF", "0.5"))
+BACKOFF_CAP = float(os.environ.get("NUTRISLICE_BACKOFF_CAP", "8"))
+DEADLINE = float(os.environ.get("NUTRISLICE_DEADLINE", "60"))
+TIMEOUT = float(os.environ.get("NUTRISLICE_TIMEOUT", "25"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """所有抓取共用一个 Session：连接池 + keep-alive，避免每个档口重新握手"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update(HEADERS)
+                _session = s
+    return _session
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = TIMEOUT,
+    retries: int = MAX_RETRIES,
+    deadline: float = DEADLINE,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    GET with retries on connection errors, timeouts, 429 and 5xx.
+    The whole call (all attempts + sleeps) never runs past `deadline` seconds.
+    Raises the last error if every attempt fails.
+    stream=True leaves the body unread so callers can consume it with iter_content().
+    The returned response (or the raised error) carries `retries`, the attempts beyond the first.
+    """
+    session = get_session()
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+
+    while True:
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            timeout_error = TimeoutError(f"Deadline of {deadline}s exceeded for {url}")
+            timeout_error.retries = attempt
+            raise timeout_error
+
+        try:
+            r = session.get(url, headers=headers, timeout=min(timeout, remaining), stream=stream)
+            if r.status_code not in RETRY_STATUS:
+                if r.status_code >= 400:
+                    # 不重试的 4xx：stream=True 时 body 还没读，不关的话这条连接回不到连接池
+                    r.close()
+                    try:
+                        r.raise_for_status()
+                    except requests.HTTPError as http_error:
+                        http_error.retries = attempt
+                        raise
+                r.retries = attempt
+                return r
+            r.close()
+            error: Exception = requests.HTTPError(f"{r.status_code} Server Error for url: {url}", response=r)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        error.retries = attempt
+        if attempt >= retries:
+            raise error
+
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay >= give_up_at:
+            raise error
+
+        attempt += 1
+        print(f"Retry {attempt}/{retries} for {url} in {delay:.1f}s ({error})")
+        time.sleep(delay)
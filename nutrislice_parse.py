@@ -0,0 +1,222 @@
+import datetime
+import re
+from typing import Any, Dict, List, Optional
+
+import closures
+import nutrislice_cache
+
+# detect_header_text 版本（east / west / sac / jasmine）：任何非菜品条目只要有文字就当标题
+HEADER_MODE_TEXT = "text"
+# is_section_title / is_station_header 版本（roth / dental）：只认带标记的标题
+HEADER_MODE_FLAG = "flag"
+
+OUTPUT_FLAT = "flat"
+OUTPUT_SECTIONS = "sections"
+
+_TEXT_MODE_KEYS = ("name", "text", "label", "description", "menu_item_name")
+_FLAG_MODE_KEYS = ("text", "name", "label", "description", "menu_item_name")
+
+# 没有菜的日子里，这样的文字条目也算关门通知（有的档口不打 is_holiday 标记）
+_CLOSED_RE = re.compile(r"\bclosed\b", re.I)
+
+
+def _first_text(mi: Dict[str, Any], keys: tuple) -> Optional[str]:
+    for k in keys:
+        v = mi.get(k)
+        if isinstance(v, str):
+            v = v.strip()
+            if v:
+                return v
+    return None
+
+
+def safe_food_name(mi: Dict[str, Any]) -> Optional[str]:
+    food = mi.get("food")
+    if isinstance(food, dict):
+        name = food.get("name")
+        if isinstance(name, str):
+            name = name.strip()
+            if name:
+                return name
+    return None
+
+
+def header_text(mi: Dict[str, Any], header_mode: str = HEADER_MODE_TEXT) -> Optional[str]:
+    """非菜品条目的标题文字；不是标题就返回 None"""
+    if mi.get("food"):
+        return None
+
+    if header_mode == HEADER_MODE_FLAG:
+        if not (mi.get("is_section_title") or mi.get("is_station_header")):
+            return None
+        return _first_text(mi, _FLAG_MODE_KEYS)
+
+    text = _first_text(mi, _TEXT_MODE_KEYS)
+    if text:
+        return text
+
+    cat = mi.get("category")
+    if isinstance(cat, dict):
+        title = cat.get("name")
+        if isinstance(title, str) and title.strip():
+            return title.strip()
+
+    return None
+
+
+def pick_section_name(mi: Dict[str, Any], current_section: Optional[str]) -> str:
+    mc = mi.get("menu_category")
+
+    # 绝大多数条目：menu_category 带一个正常的名字，直接用，不再走后面的 fallback 链
+    if type(mc) is dict:
+        name = mc.get("name")
+        if type(name) is str and name != "Other":
+            stripped = name.strip()
+            if stripped:
+                return stripped
+
+    cat = mi.get("category")
+
+    sec = (
+        (mc.get("name") if isinstance(mc, dict) else None)
+        or (cat.get("name") if isinstance(cat, dict) else None)
+        or mi.get("category_name")
+        or mi.get("station")
+        or "Other"
+    )
+
+    if sec == "Other" and current_section:
+        return current_section
+
+    if not isinstance(sec, str) or not sec.strip():
+        return current_section or "Other"
+
+    return sec.strip()
+
+
+def dedupe_preserve_order(items: List[str]) -> List[str]:
+    seen = set()
+    out: List[str] = []
+    for x in items:
+        if x not in seen:
+            seen.add(x)
+            out.append(x)
+    return out
+
+
+def closure_reason(menu_items: List[Any]) -> Optional[str]:
+    """
+    当天是不是关门：一道菜都没有，只有 is_holiday 条目或写着 Closed 的文字条目时，
+    返回这些条目的文字（e.g. 'Closed for Winter Break'）；碰到第一道菜就返回 None，正常的日子几乎不花时间。
+    """
+    reasons: List[str] = []
+    for mi in menu_items:
+        if not isinstance(mi, dict):
+            continue
+        if mi.get("food"):
+            return None
+        text = _first_text(mi, _FLAG_MODE_KEYS)
+        if mi.get("is_holiday"):
+            reasons.append(text or "Closed")
+        elif text and _CLOSED_RE.search(text):
+            reasons.append(text)
+    return "; ".join(dedupe_preserve_order(reasons)) or None
+
+
+def walk_sections(menu_items: List[Any], header_mode: str = HEADER_MODE_TEXT) -> Dict[str, List[str]]:
+    """
+    单次遍历 menu_items，得到 {section: [菜名...]}。
+    section 按首次出现排序，每个 section 内边走边去重，不再额外拷贝列表。
+    """
+    section_map: Dict[str, List[str]] = {}
+    seen: Dict[str, set] = {}
+    current_section: Optional[str] = None
+
+    for mi in menu_items:
+        if not isinstance(mi, dict):
+            continue
+
+        if not mi.get("food"):
+            ht = header_text(mi, header_mode)
+            if ht:
+                current_section = ht
+            continue
+
+        name = safe_food_name(mi)
+        if not name:
+            continue
+
+        sec = pick_section_name(mi, current_section)
+        names = section_map.get(sec)
+        if names is None:
+            section_map[sec] = [name]
+            seen[sec] = {name}
+        elif name not in seen[sec]:
+            names.append(name)
+            seen[sec].add(name)
+
+    return section_map
+
+
+def flatten(section_map: Dict[str, List[str]]) -> List[str]:
+    seen = set()
+    out: List[str] = []
+    for names in section_map.values():
+        for n in names:
+            if n not in seen:
+                seen.add(n)
+                out.append(n)
+    return out
+
+
+def parse_day(
+    day_block: Optional[Dict[str, Any]],
+    date_str: str,
+    header_mode: str = HEADER_MODE_TEXT,
+    output: str = OUTPUT_FLAT,
+) -> Dict[str, Any]:
+    """
+    把一天的 day block 变成统一结构：
+      {"status": ok | no_data_today | closed, "message": ..., "items": [...]}        (output="flat")
+      {"status": ..., "message": ..., "sections": [{"section", "items"}, ...]}       (output="sections")
+    关门 / 放假的日子在遍历菜品之前就认出来，message 是关门原因。
+    """
+    key = "items" if output == OUTPUT_FLAT else "sections"
+
+    if not day_block:
+        return {"status": "no_data_today", "message": f"API data does not contain {date_str}.", key: []}
+
+    menu_items = day_block.get("menu_items") or []
+    if not menu_items:
+        return {"status": "no_data_today", "message": f"{date_str} menu_items empty.", key: []}
+
+    reason = closure_reason(menu_items)
+    if reason is not None:
+        return {"status": "closed", "message": reason, key: []}
+
+    section_map = walk_sections(menu_items, header_mode)
+    if not section_map:
+        return {"status": "no_data_today", "message": "No food names parsed.", key: []}
+
+    if output == OUTPUT_FLAT:
+        body: List[Any] = flatten(section_map)
+    else:
+        body = [{"section": sec, "items": names} for sec, names in section_map.items()]
+
+    return {"status": "ok", "message": "Menu fetched.", key: body}
+
+
+def load_parsed_day(
+    school: str,
+    menu_type: str,
+    date_obj: datetime.date,
+    parse_key: str,
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """抓取（或从缓存读取）某天的菜单并按 options 解析；解析结果同样走缓存。认出关门的记进 closures"""
+    date_str = date_obj.strftime("%Y-%m-%d")
+    result = nutrislice_cache.load_day(
+        school, menu_type, date_obj, lambda d: parse_day(d, date_str, **options), parse_key
+    )
+    closures.record(school, menu_type, date_str, result)
+    return result
@@ -0,0 +1,228 @@
+import argparse
+import datetime
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import atomic_io
+import nutrislice_cache
+import nutrislice_http
+import registry
+
+# 录下来的原始周 payload：fixtures/nutrislice/<school>/<menu_type>/<week_key>.json
+FIXTURE_DIR = os.environ.get("WOLFIE_FIXTURE_DIR", os.path.join("fixtures", "nutrislice"))
+
+_PATH_RE = re.compile(r"^/menu/api/weeks/school/([^/]+)/menu-type/([^/]+)/(\d{4})/(\d{1,2})/(\d{1,2})/?$")
+_WEEK_FILE_RE = re.compile(r"^(\d{4})-W(\d{2})\.json$")
+
+
+def fixture_path(school: str, menu_type: str, date_obj: datetime.date) -> str:
+    return os.path.join(FIXTURE_DIR, school, menu_type, f"{nutrislice_cache.week_key(date_obj)}.json")
+
+
+# --- Recorder ---
+
+
+def _record_week(school: str, menu_type: str, date_obj: datetime.date) -> Tuple[str, int]:
+    r = nutrislice_http.get(nutrislice_cache.week_url(school, menu_type, date_obj))
+    path = fixture_path(school, menu_type, date_obj)
+    atomic_io.write_bytes_if_changed(path, r.content)
+    return path, len(r.content)
+
+
+def record(today: datetime.date, weeks: int = 1) -> List[Tuple[str, int]]:
+    """
+    把这次运行会用到的每个 (school, menu_type) 的周 payload 原样存成 fixture，
+    weeks > 1 时顺带录后面几周。直接请求 API_BASE，不经过缓存。
+    """
+    jobs = {}
+    for school, menu_type, d in registry.planned_fetches(today):
+        for w in range(weeks):
+            day = d + datetime.timedelta(weeks=w)
+            jobs.setdefault((school, menu_type, nutrislice_cache.week_key(day)), day)
+
+    with ThreadPoolExecutor(max_workers=nutrislice_http.POOL_SIZE) as pool:
+        futures = [pool.submit(_record_week, school, menu_type, d) for (school, menu_type, _), d in jobs.items()]
+        return [f.result() for f in futures]
+
+
+# --- Stand-in server ---
+
+
+def _week_monday(key: str) -> datetime.date:
+    year, week = _WEEK_FILE_RE.match(key + ".json").groups()
+    return datetime.date.fromisocalendar(int(year), int(week), 1)
+
+
+def _shift_dates(body: bytes, days: int) -> bytes:
+    """把录下来那一周的 date 字段整体挪到请求的那一周"""
+    payload = json.loads(body)
+    for day in payload.get("days") or []:
+        if not isinstance(day, dict):
+            continue
+        for obj in [day] + [mi for mi in day.get("menu_items") or [] if isinstance(mi, dict)]:
+            value = obj.get("date")
+            if isinstance(value, str) and len(value) == 10:
+                obj["date"] = (datetime.date.fromisoformat(value) + datetime.timedelta(days=days)).isoformat()
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def fixture_body(school: str, menu_type: str, date_obj: datetime.date, exact: bool = False) -> Optional[bytes]:
+    """
+    对应那一周的 fixture；没有录到这一周时（exact=False）拿这个 menu 最近录的一周，
+    把日期挪过来，这样任何一天跑 scraper 都有数据。
+    """
+    path = fixture_path(school, menu_type, date_obj)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    if exact:
+        return None
+
+    directory = os.path.dirname(path)
+    weeks = sorted(n for n in os.listdir(directory) if _WEEK_FILE_RE.match(n)) if os.path.isdir(directory) else []
+    if not weeks:
+        return None
+    with open(os.path.join(directory, weeks[-1]), "rb") as f:
+        body = f.read()
+    wanted = _week_monday(nutrislice_cache.week_key(date_obj))
+    return _shift_dates(body, (wanted - _week_monday(weeks[-1][: -len(".json")])).days)
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    etag: bool = True,
+    exact: bool = False,
+    seed: Optional[int] = None,
+) -> http.server.ThreadingHTTPServer:
+    """
+    按 Nutrislice 的 URL 格式回放 fixture。
+    latency / jitter 单位是秒；error_rate 的请求回 503（让 nutrislice_http 走重试）；
+    etag=True 时带 ETag，If-None-Match 对上就回 304。
+    server.stats 里记着各状态码的次数和发出的字节数。
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    stats: Dict[str, Any] = {"requests": 0, "bytes": 0, "status": {}}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+            with lock:
+                stats["requests"] += 1
+                stats["bytes"] += len(body)
+                stats["status"][code] = stats["status"].get(code, 0) + 1
+            self.send_response(code)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            with lock:
+                delay = latency + rng.uniform(0, jitter)
+                fail = rng.random() < error_rate
+            if delay > 0:
+                time.sleep(delay)
+
+            m = _PATH_RE.match(self.path.split("?", 1)[0])
+            if not m:
+                self._send(404)
+                return
+            if fail:
+                self._send(503)
+                return
+
+            school, menu_type, y, mo, d = m.groups()
+            body = fixture_body(school, menu_type, datetime.date(int(y), int(mo), int(d)), exact)
+            if body is None:
+                self._send(404)
+                return
+
+            headers = {"Content-Type": "application/json"}
+            if etag:
+                tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == tag:
+                    self._send(304, headers={"ETag": tag})
+                    return
+                headers["ETag"] = tag
+            self._send(200, body, headers)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.stats = stats  # type: ignore[attr-defined]
+    return server
+
+
+def start(**kwargs: Any) -> Tuple[http.server.ThreadingHTTPServer, str]:
+    """后台线程里起一个替身服务器，返回 (server, base_url)；测试 / benchmark 用"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record Nutrislice payloads and replay them from a local server.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="save the week payloads every location needs as fixtures")
+    p.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    p.add_argument("--weeks", type=int, default=1)
+
+    p = sub.add_parser("serve", help="serve the fixtures on the Nutrislice URL layout")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.0, help="ms added to every response")
+    p.add_argument("--jitter", type=float, default=0.0, help="random extra ms, 0..jitter")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    p.add_argument("--no-etag", action="store_true", help="never answer 304")
+    p.add_argument("--exact", action="store_true", help="404 for weeks that were not recorded")
+    p.add_argument("--seed", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        day = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+        for path, size in record(day, args.weeks):
+            print(f"{path} ({size} bytes)")
+        return 0
+
+    server = make_server(
+        args.host,
+        args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        etag=not args.no_etag,
+        exact=args.exact,
+        seed=args.seed,
+    )
+    print(f"Serving {FIXTURE_DIR} -- run scrapers with NUTRISLICE_API_BASE=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+# 解析菜单真正会读到的字段；其余（营养、图标、过敏原……）在解码时直接丢掉
+MENU_FIELDS = frozenset(
+    {
+        "date",
+        "menu_items",
+        "food",
+        "id",
+        "name",
+        "text",
+        "label",
+        "description",
+        "menu_item_name",
+        "menu_category",
+        "category",
+        "category_name",
+        "station",
+        "is_section_title",
+        "is_station_header",
+        "is_holiday",
+    }
+)
+
+# 一次吃掉括号之间的所有内容（包括完整的字符串），只在括号或断开的字符串处停下
+_SKIP_RE = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_DAYS_KEY_RE = re.compile(rb'"days"\s*:\s*\Z')
+_DATE_RE = re.compile(rb'"date"\s*:\s*"([^"\\]*)"')
+
+
+def slim_hook(fields: frozenset = MENU_FIELDS) -> Callable[[List[Tuple[str, Any]]], Dict[str, Any]]:
+    def hook(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        return {k: v for k, v in pairs if k in fields}
+
+    return hook
+
+
+def iter_file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_day_spans(chunks: Iterable[bytes]) -> Iterator[Tuple[Optional[str], int, bytes]]:
+    """
+    逐块扫描 weeks payload，依次产出 (date, 在整个 body 里的字节偏移, day 对象的原始字节)。
+    只在括号处停下来数层级，不解码任何东西；同一时间内存里最多只有一天的数据。
+    """
+    buf = b""
+    base = 0  # buf[0] 在整个 body 里的偏移
+    pos = 0
+    depth = 0
+    in_days = False
+    day_start = -1
+
+    for chunk in chunks:
+        buf += chunk
+
+        while True:
+            pos = _SKIP_RE.match(buf, pos).end()
+            if pos >= len(buf) or buf[pos] == 0x22:  # 到块末尾 / 字符串被切断，等下一块
+                break
+
+            c = buf[pos]
+            if c == 0x7B or c == 0x5B:  # '{' '['
+                depth += 1
+                if depth == 2 and c == 0x5B:
+                    in_days = _DAYS_KEY_RE.search(buf, max(0, pos - 64), pos) is not None
+                elif depth == 3 and in_days:
+                    day_start = pos
+            else:
+                if depth == 3 and in_days and day_start >= 0:
+                    raw = buf[day_start : pos + 1]
+                    m = _DATE_RE.search(raw)
+                    yield (m.group(1).decode("utf-8") if m else None), base + day_start, raw
+                    day_start = -1
+                elif depth == 2:
+                    in_days = False
+                depth -= 1
+            pos += 1
+
+        # 不在某一天里面时，之前的字节都用不上了（留一点尾巴给 "days" 的 key 判断）
+        if day_start < 0:
+            cut = max(0, pos - 64)
+        else:
+            cut = day_start
+            day_start = 0
+        if cut:
+            buf = buf[cut:]
+            base += cut
+            pos -= cut
+
+    if depth != 0:
+        raise ValueError("Truncated Nutrislice payload")
+
+
+def index_days(chunks: Iterable[bytes]) -> Dict[str, List[int]]:
+    """{date: [偏移, 长度]}，下载时顺手算好，之后读某一天只需 seek + 解码这一段"""
+    index: Dict[str, List[int]] = {}
+    for date_str, offset, raw in iter_day_spans(chunks):
+        if date_str is not None and date_str not in index:
+            index[date_str] = [offset, len(raw)]
+    return index
+
+
+def read_day(path: str, span: List[int], fields: Optional[frozenset] = MENU_FIELDS) -> Dict[str, Any]:
+    offset, length = span
+    with open(path, "rb") as f:
+        f.seek(offset)
+        raw = f.read(length)
+    return json.loads(raw, object_pairs_hook=slim_hook(fields) if fields is not None else None)
+
+
+def iter_days(
+    chunks: Iterable[bytes],
+    dates: Optional[Set[str]] = None,
+    fields: Optional[frozenset] = MENU_FIELDS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    只解码 dates 里的那几天（None = 全部）；fields 不为 None 时只保留这些字段。
+    """
+    hook = slim_hook(fields) if fields is not None else None
+    for date_str, _, raw in iter_day_spans(chunks):
+        if dates is not None and date_str is not None and date_str not in dates:
+            continue
+        day = json.loads(raw, object_pairs_hook=hook)
+        if dates is not None and day.get("date") not in dates:
+            continue
+        yield day
+
+
+def find_day_in_file(path: str, date_str: str, fields: Optional[frozenset] = MENU_FIELDS) -> Optional[Dict[str, Any]]:
+    for day in iter_days(iter_file_chunks(path), {date_str}, fields):
+        return day
+    return None
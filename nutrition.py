@@ -0,0 +1,184 @@
+import datetime
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import atomic_io
+import dish_dict
+import lookahead
+import nutrislice_cache
+import nutrislice_parse
+import registry
+
+# 营养 / 过敏原单独放一个文件，按 Nutrislice food id 去重，每个菜只存一份；各地点的菜单文件不变
+NUTRITION_PATH = "nutrition.json"
+
+# 设为 0 跳过这一步
+ENABLED = os.environ.get("WOLFIE_NUTRITION", "1") != "0"
+
+# nutrition.json 的大小上限；超了就不再收新的菜（今天的菜排在前面，先被收进去）
+BUDGET_BYTES = int(os.environ.get("WOLFIE_NUTRITION_BUDGET", str(96 * 1024)))
+
+# 只留页面上会用到的几项（Nutrislice 的 rounded_nutrition_info 里有二十多项）
+NUTRIENTS = (
+    "calories",
+    "g_fat",
+    "g_saturated_fat",
+    "g_carbs",
+    "g_sugar",
+    "g_fiber",
+    "g_protein",
+    "mg_sodium",
+    "mg_cholesterol",
+)
+
+# 每个 food 一行：[dish id, 份量, 图标/过敏原下标, 各营养值...]
+COLUMNS = ("dish", "serving", "icons") + NUTRIENTS
+
+
+def _number(v: Any) -> Optional[float]:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return None
+    v = round(float(v), 1)
+    return int(v) if v.is_integer() else v
+
+
+def _serving(food: Dict[str, Any]) -> str:
+    info = food.get("serving_size_info")
+    if not isinstance(info, dict):
+        return ""
+    parts = [info.get("serving_size_amount"), info.get("serving_size_unit")]
+    return " ".join(str(p).strip() for p in parts if p not in (None, ""))
+
+
+def _icon_names(food: Dict[str, Any]) -> List[str]:
+    """food_icons 里的 Vegan / Contains Milk 之类；synced_name 优先"""
+    icons = food.get("icons")
+    raw = icons.get("food_icons") if isinstance(icons, dict) else None
+    out: List[str] = []
+    for icon in raw or []:
+        if not isinstance(icon, dict) or icon.get("enabled") is False:
+            continue
+        name = icon.get("synced_name") or icon.get("name") or icon.get("help_text")
+        if isinstance(name, str) and name.strip() and name.strip() not in out:
+            out.append(name.strip())
+    return out
+
+
+def food_row(
+    mi: Dict[str, Any], dictionary: Dict[str, Any], icon_ids: Dict[str, int], icons: List[str]
+) -> Optional[List[Any]]:
+    """一条 menu item -> COLUMNS 顺序的一行；没有任何营养 / 图标 / 份量信息就返回 None"""
+    name = nutrislice_parse.safe_food_name(mi)
+    if not name:
+        return None
+    food = mi["food"]
+    info = food.get("rounded_nutrition_info")
+    values = [_number(info.get(k)) if isinstance(info, dict) else None for k in NUTRIENTS]
+    serving = _serving(food)
+    names = _icon_names(food)
+    if not serving and not names and all(v is None for v in values):
+        return None
+
+    refs = []
+    for n in names:
+        if n not in icon_ids:
+            icon_ids[n] = len(icons)
+            icons.append(n)
+        refs.append(icon_ids[n])
+    return [dish_dict.intern(dictionary, name), serving, refs] + values
+
+
+def _planned_days(today: datetime.date) -> List[tuple]:
+    """今天的 (school, menu_type, 日期) 在前，本周剩下的天在后；都在已经抓好的周 payload 里"""
+    seen = set()
+    out = []
+    for d in lookahead.lookahead_dates(today):
+        for job in registry.planned_fetches(d):
+            if job not in seen:
+                seen.add(job)
+                out.append(job)
+    return out
+
+
+def build_table(today: datetime.date, dictionary: Dict[str, Any], budget: int = BUDGET_BYTES) -> Dict[str, Any]:
+    """
+    {"columns": COLUMNS, "icons": [...], "foods": {food id: row}, "dropped": 超出预算没收的个数, "failed": 没取到的天数}
+    读的是 fields=None 的完整 day block（菜单解析时这些字段会被裁掉）。failed 只给 write_table 用，不写进文件。
+    """
+    icons: List[str] = []
+    icon_ids: Dict[str, int] = {}
+    foods: Dict[str, List[Any]] = {}
+    skipped = set()
+    failed = 0
+    # 固定的表头（columns 等）也算进预算
+    size = len(json.dumps({"columns": COLUMNS, "icons": [], "foods": {}, "dropped": 0}))
+
+    for school, menu_type, d in _planned_days(today):
+        try:
+            day = nutrislice_cache.get_day(school, menu_type, d, fields=None)
+        except Exception as e:
+            print(f"[nutrition] {school}/{menu_type} {d} failed: {e}")
+            failed += 1
+            continue
+        for mi in (day or {}).get("menu_items") or []:
+            if not isinstance(mi, dict) or not isinstance(mi.get("food"), dict):
+                continue
+            food_id = str(mi["food"].get("id") or "")
+            if not food_id or food_id in foods or food_id in skipped:
+                continue
+            row = food_row(mi, dictionary, icon_ids, icons)
+            if row is None:
+                continue
+            # "id":[...], 的长度；图标名单很短，不单独扣
+            cost = len(food_id) + len(json.dumps(row, ensure_ascii=False, separators=(",", ":"))) + 4
+            if size + cost > budget:
+                skipped.add(food_id)
+                continue
+            size += cost
+            foods[food_id] = row
+
+    return {"columns": list(COLUMNS), "icons": icons, "foods": foods, "dropped": len(skipped), "failed": failed}
+
+
+def _info(path: str, body: bytes, table: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "file": path,
+        "hash": hashlib.sha256(body).hexdigest()[:16],
+        "bytes": len(body),
+        "count": len(table.get("foods") or {}),
+        "dropped": table.get("dropped", 0),
+    }
+
+
+def write_table(today: datetime.date, path: str = NUTRITION_PATH) -> Dict[str, Any]:
+    """
+    写出 nutrition.json，返回 {"file", "hash", "bytes", "count", "dropped"} 给 manifest。
+    有 day block 没取到或者一个菜都没收到（Nutrislice 挂了）时不覆盖，沿用上一次的 nutrition.json。
+    """
+    dictionary = dish_dict.load()
+    table = build_table(today, dictionary)
+    failed = table.pop("failed")
+
+    if failed or not table["foods"]:
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+            previous = json.loads(body)
+        except (OSError, ValueError):
+            previous = None
+        if isinstance(previous, dict):
+            print(f"[nutrition] {failed} days failed, {len(table['foods'])} foods; keeping previous {path}")
+            return _info(path, body, previous)
+
+    dish_dict.save(dictionary)
+    body = json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    atomic_io.write_bytes_if_changed(path, body)
+    return _info(path, body, table)
+
+
+if __name__ == "__main__":
+    info = write_table(datetime.datetime.now(ZoneInfo("America/New_York")).date())
+    print(f"Successfully wrote {info['file']} ({info['count']} foods, {info['bytes']} bytes, {info['dropped']} over budget)")
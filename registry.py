@@ -0,0 +1,166 @@
+import datetime
+import functools
+import importlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import atomic_io
+
+# 所有地点 / 档口 / slug / 输出文件都登记在这里；加档口只改 locations.json
+REGISTRY_PATH = os.environ.get(
+    "WOLFIE_REGISTRY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "locations.json")
+)
+
+# 前端读取的清单（index.html 先拿它，再按里面的文件名取数据）
+MANIFEST_PATH = "manifest.json"
+
+WEB_MENU_TEMPLATE = "https://stonybrook.nutrislice.com/menu/{school}/{menu_type}/{date}"
+
+STALL_TYPE_NUTRISLICE = "nutrislice"
+STALL_TYPE_CHAIN = "chain"
+
+
+@functools.lru_cache(maxsize=None)
+def load() -> Dict[str, Any]:
+    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def all_locations() -> List[Dict[str, Any]]:
+    return load()["locations"]
+
+
+def location(location_id: str) -> Dict[str, Any]:
+    for loc in all_locations():
+        if loc["id"] == location_id:
+            return loc
+    raise KeyError(f"Unknown location: {location_id}")
+
+
+def stalls(location_id: str) -> List[Dict[str, Any]]:
+    return location(location_id).get("stalls", [])
+
+
+def output_file(location_id: str) -> str:
+    return location(location_id)["output"]
+
+
+def fixed_menu_date() -> datetime.date:
+    """非 daily 档口统一用的固定日期（这些档口的菜单不按天变）"""
+    return datetime.date.fromisoformat(load()["fixed_menu_date"])
+
+
+def stall_type(stall: Dict[str, Any]) -> str:
+    return stall.get("type", STALL_TYPE_NUTRISLICE)
+
+
+def stall_date(stall: Dict[str, Any], today: datetime.date) -> datetime.date:
+    """daily 档口用今天；其余用档口自己的 fixed_date，没有就用全局固定日期"""
+    if stall.get("daily"):
+        return today
+    if stall.get("fixed_date"):
+        return datetime.date.fromisoformat(stall["fixed_date"])
+    return fixed_menu_date()
+
+
+def menu_url(stall: Dict[str, Any], date_obj: datetime.date) -> str:
+    """给用户点的网页链接；网页上的 school slug 可能和 API 的不一样 (web_school)"""
+    if stall.get("menu_url"):
+        return stall["menu_url"]
+    return WEB_MENU_TEMPLATE.format(
+        school=stall.get("web_school") or stall["school"],
+        menu_type=stall["menu_type"],
+        date=date_obj.strftime("%Y-%m-%d"),
+    )
+
+
+def scraper(loc: Dict[str, Any]) -> Optional[Callable[[], None]]:
+    """'module:function' -> 函数；手工维护的地点 (scraper 为 null) 返回 None"""
+    spec = loc.get("scraper")
+    if not spec:
+        return None
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name or "main")
+
+
+def builder(loc: Dict[str, Any]) -> Optional[Callable[[datetime.date, datetime.datetime], Dict[str, Any]]]:
+    """scraper 所在模块的 build_menu(menu_date, now)：只生成某一天的输出、不写文件"""
+    spec = loc.get("scraper")
+    if not spec:
+        return None
+    module = importlib.import_module(spec.partition(":")[0])
+    return getattr(module, "build_menu", None)
+
+
+def planned_fetches(today: datetime.date) -> List[Tuple[str, str, datetime.date]]:
+    """
+    这次运行会用到的所有 (school, menu_type, 日期)，按出现顺序去重。
+    runner 用它在跑各地点之前一次性把需要的周 payload 并发拉好。
+    """
+    seen = set()
+    out: List[Tuple[str, str, datetime.date]] = []
+    for loc in all_locations():
+        if not loc.get("scraper"):
+            continue
+        for s in loc.get("stalls", []):
+            if stall_type(s) != STALL_TYPE_NUTRISLICE:
+                continue
+            job = (s["school"], s["menu_type"], stall_date(s, today))
+            if job not in seen:
+                seen.add(job)
+                out.append(job)
+    return out
+
+
+def manifest(
+    bundle: Optional[Dict[str, Any]] = None,
+    search: Optional[Dict[str, Any]] = None,
+    nutrition: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    hours: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    bundle 为 bundle.write_bundle() 的返回值；前端优先一次取 bundle，取不到再按 file 逐个取。
+    search 为 search_index.write_index() 的返回值，nutrition 为 nutrition.write_table() 的返回值，
+    changes 为 menu_changes.write_changes() 的返回值，hours 为 schedule.write_hours() 的返回值。
+    """
+    out: Dict[str, Any] = {
+        "locations": [
+            {
+                "id": loc["hall_id"],
+                "key": loc["data_key"],
+                "name": loc["name"],
+                "view": loc["view"],
+                "file": loc["output"],
+            }
+            for loc in all_locations()
+        ]
+    }
+    if bundle is not None:
+        out["bundle"] = bundle
+    if search is not None:
+        out["search"] = search
+    if nutrition is not None:
+        out["nutrition"] = nutrition
+    if changes is not None:
+        out["changes"] = changes
+    if hours is not None:
+        out["hours"] = hours
+    return out
+
+
+def write_manifest(
+    path: str = MANIFEST_PATH,
+    bundle: Optional[Dict[str, Any]] = None,
+    search: Optional[Dict[str, Any]] = None,
+    nutrition: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    hours: Optional[Dict[str, Any]] = None,
+) -> None:
+    atomic_io.write_json(path, manifest(bundle, search, nutrition, changes, hours), indent=2)
+
+
+if __name__ == "__main__":
+    write_manifest()
+    print(f"Successfully wrote {MANIFEST_PATH}")
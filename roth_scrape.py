@@ -1,210 +1,61 @@
-import json
 import datetime
-from typing import Any, Dict, List, Optional
-
-import requests
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
-    "Accept": "application/json",
-}
-
-API_SCHOOL_SLUG = "roth"
-
-WEB_SCHOOL_SLUG = "roth-cafe"
-
-API_TEMPLATE = (
-    "https://stonybrook.api.nutrislice.com/menu/api/weeks/school/{school}/menu-type/"
-    "{slug}/{year}/{month}/{day}/?format=json"
-)
-
-FIXED_DATE = datetime.date(2026, 1, 27)
-
-ROTH_SECTIONS = [
-    {
-        "section": "Subway",
-        "type": "chain",
-        "slug": None,
-        "items": ["Click to view the official menu"],
-        "menu_url": "https://www.subway.com/en-us/menu",
-    },
-    {
-        "section": "Smash n' Shake",
-        "type": "static",
-        "slug": "smash-n-shake",
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/{WEB_SCHOOL_SLUG}/smash-n-shake/{FIXED_DATE.strftime('%Y-%m-%d')}",
-    },
-    {
-        "section": "Savor",
-        "type": "static",
-        "slug": "chef-jet",
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/{WEB_SCHOOL_SLUG}/chef-jet/{FIXED_DATE.strftime('%Y-%m-%d')}",
-    },
-    {
-        "section": "Popeyes",
-        "type": "chain",
-        "slug": None,
-        "items": ["Click to view the official menu"],
-        "menu_url": "https://www.popeyes.com/menu",
-    },
-]
-
-
-def safe_food_name(mi: Dict[str, Any]) -> Optional[str]:
-    food = mi.get("food") or {}
-    if isinstance(food, dict):
-        name = food.get("name")
-        if isinstance(name, str) and name.strip():
-            return name.strip()
-    return None
-
-
-def is_header_item(mi: Dict[str, Any]) -> bool:
-    if mi.get("food"):
-        return False
-    return bool(mi.get("is_section_title") or mi.get("is_station_header"))
-
-
-def header_text(mi: Dict[str, Any]) -> Optional[str]:
-    for k in ("text", "name", "label", "description", "menu_item_name"):
-        v = mi.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
-    return None
-
-
-def pick_section_name(mi: Dict[str, Any], current_section: Optional[str]) -> str:
-    mc = mi.get("menu_category")
-    cat = mi.get("category")
-
-    mc_name = mc.get("name") if isinstance(mc, dict) else None
-    cat_name = cat.get("name") if isinstance(cat, dict) else None
-
-    sec = (
-        mc_name
-        or cat_name
-        or mi.get("category_name")
-        or mi.get("station")
-        or "Other"
-    )
-
-    if (not sec or sec == "Other") and current_section:
-        sec = current_section
-
-    if not isinstance(sec, str) or not sec.strip():
-        return current_section or "Other"
-
-    return sec.strip()
-
-
-def dedupe_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import menu_writer
+import nutrislice_cache
+import nutrislice_parse
+import registry
+
+LOCATION_ID = "roth"
+
+FIXED_DATE = registry.fixed_menu_date()
 
+MAX_WORKERS = 4
 
-def flatten_blocks(section_map: Dict[str, List[str]]) -> List[str]:
-    merged: List[str] = []
-    for _, names in section_map.items():
-        merged.extend(names)
-    return dedupe_preserve_order(merged)
+PARSE_KEY = "roth:v3"
 
+PARSE_OPTIONS = {"header_mode": nutrislice_parse.HEADER_MODE_FLAG, "output": nutrislice_parse.OUTPUT_FLAT}
 
-def fetch_static_menu(menu_type_slug: str, date_obj: datetime.date) -> Dict[str, Any]:
-    url = API_TEMPLATE.format(
-        school=API_SCHOOL_SLUG,
-        slug=menu_type_slug,
-        year=date_obj.year,
-        month=f"{date_obj.month:02d}",
-        day=f"{date_obj.day:02d}",
-    )
-    date_str = date_obj.strftime("%Y-%m-%d")
+# 档口列表在 locations.json 里；Subway / Popeyes 是 chain，只放官方菜单链接
+ROTH_SECTIONS = registry.stalls(LOCATION_ID)
+
+
+def fetch_static_menu(school: str, menu_type_slug: str, date_obj: datetime.date) -> Dict[str, Any]:
+    url = nutrislice_cache.week_url(school, menu_type_slug, date_obj)
 
     try:
-        r = requests.get(url, headers=HEADERS, timeout=25)
-        r.raise_for_status()
-        data = r.json()
-
-
-        day_block = None
-        for d in data.get("days", []):
-            if d.get("date") == date_str:
-                day_block = d
-                break
-
-        if not day_block:
-            return {
-                "status": "no_data_today",
-                "message": f"API missing {date_str}",
-                "source_url": url,
-                "items": [],
-            }
-
-        menu_items = day_block.get("menu_items") or []
-        if not menu_items:
-            return {
-                "status": "no_data_today",
-                "message": f"{date_str} menu_items empty",
-                "source_url": url,
-                "items": [],
-            }
-
-     
-        if (
-            len(menu_items) == 1
-            and isinstance(menu_items[0], dict)
-            and menu_items[0].get("is_holiday")
-            and isinstance(menu_items[0].get("text"), str)
-        ):
-            return {
-                "status": "closed",
-                "message": menu_items[0].get("text").strip(),
-                "source_url": url,
-                "items": [],
-            }
-
-        section_map: Dict[str, List[str]] = {}
-        current_section: Optional[str] = None
-
-        for mi in menu_items:
-            if not isinstance(mi, dict):
-                continue
-
-            if is_header_item(mi):
-                ht = header_text(mi)
-                if ht:
-                    current_section = ht
-                continue
-
-            name = safe_food_name(mi)
-            if not name:
-                continue
-
-            sec = pick_section_name(mi, current_section)
-            section_map.setdefault(sec, []).append(name)
-
-        items = flatten_blocks(section_map)
-        if not items:
-            return {
-                "status": "no_data_today",
-                "message": "No food names parsed",
-                "source_url": url,
-                "items": [],
-            }
-
-        return {"status": "ok", "message": "Menu fetched.", "source_url": url, "items": items}
+        parsed = nutrislice_parse.load_parsed_day(school, menu_type_slug, date_obj, PARSE_KEY, PARSE_OPTIONS)
+        return {**parsed, "source_url": url}
 
     except Exception as e:
         return {"status": "fetch_error", "message": f"Error: {e}", "source_url": url, "items": []}
 
 
-def main() -> None:
-    # 近似 EST（你原来就是这么写的；足够用）
-    now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=-5)))
+def build_entry(sec: Dict[str, Any], today: datetime.date) -> Dict[str, Any]:
+    is_chain = registry.stall_type(sec) == registry.STALL_TYPE_CHAIN
+    use_date = registry.stall_date(sec, today)
+
+    entry: Dict[str, Any] = {
+        "section": sec["section"],
+        "type": "chain" if is_chain else "static",
+        "menu_url": registry.menu_url(sec, use_date),
+        "items": sec.get("items", []),
+        "status": "ok",
+        "message": "",
+    }
+
+    if not is_chain:
+        fetched = fetch_static_menu(sec["school"], sec["menu_type"], use_date)
+        entry["status"] = fetched["status"]
+        entry["message"] = fetched["message"]
+        entry["source_url"] = fetched["source_url"]
+        entry["items"] = fetched["items"]
+
+    return entry
+
+
+def build_menu(menu_date: datetime.date, now: datetime.datetime) -> Dict[str, Any]:
     updated_at = now.strftime("%Y-%m-%d %H:%M EST")
 
     out: Dict[str, Any] = {
@@ -216,37 +67,27 @@ def main() -> None:
         "sections": [],
     }
 
-    any_error = False
-
-    for sec in ROTH_SECTIONS:
-        entry: Dict[str, Any] = {
-            "section": sec["section"],
-            "type": sec["type"],
-            "menu_url": sec["menu_url"],
-            "items": sec.get("items", []),
-            "status": "ok",
-            "message": "",
-        }
-
-        if sec["type"] == "static":
-            fetched = fetch_static_menu(sec["slug"], FIXED_DATE)
-            entry["status"] = fetched["status"]
-            entry["message"] = fetched["message"]
-            entry["source_url"] = fetched["source_url"]
-            entry["items"] = fetched["items"]
-
-            if entry["status"] not in ("ok", "closed"):
-                any_error = True
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        out["sections"] = list(pool.map(lambda s: build_entry(s, menu_date), ROTH_SECTIONS))
 
-        out["sections"].append(entry)
+    any_error = any(e["status"] not in ("ok", "closed") for e in out["sections"])
 
     if any_error:
         out["status"] = "partial_error"
 
-    with open("roth.json", "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
+    return out
+
+
+def main() -> None:
+    # 近似 EST（你原来就是这么写的；足够用）
+    now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=-5)))
+    out = build_menu(now.date(), now)
 
-    print("Successfully wrote roth.json")
+    filename = registry.output_file(LOCATION_ID)
+    if menu_writer.write_location(LOCATION_ID, out):
+        print(f"Successfully wrote {filename}")
+    else:
+        print(f"{filename} unchanged, skipped write")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import atomic_io
+
+# 每次运行的逐条事件（请求 / 解析 / 写文件 / 地点 / 阶段）写成 JSON lines，
+# 汇总追加到 history.jsonl，跨天看哪个 Nutrislice 接口慢、哪个经常重试
+METRICS_DIR = os.environ.get("WOLFIE_METRICS_DIR", "metrics")
+EVENTS_PATH = os.path.join(METRICS_DIR, "last_run.jsonl")
+HISTORY_PATH = os.path.join(METRICS_DIR, "history.jsonl")
+
+# history.jsonl 只留最近这么多次运行
+HISTORY_KEEP = 180
+
+# 设为 0 不记录
+ENABLED = os.environ.get("WOLFIE_METRICS", "1") != "0"
+
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+def record(event: str, **fields: Any) -> None:
+    """记一条事件；各线程都可以调用"""
+    if not ENABLED:
+        return
+    fields["event"] = event
+    fields["t"] = round(time.time(), 3)
+    with _lock:
+        _events.append(fields)
+
+
+def events() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_events)
+
+
+def count_items(obj: Any) -> int:
+    """任意输出结构里所有 "items" 列表的长度之和（meals 块、sections 都适用）"""
+    if isinstance(obj, dict):
+        return sum(len(v) if k == "items" and isinstance(v, list) else count_items(v) for k, v in obj.items())
+    if isinstance(obj, list):
+        return sum(count_items(v) for v in obj)
+    return 0
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+def _request_stats(reqs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [r["latency_ms"] for r in reqs]
+    status: Dict[str, int] = {}
+    for r in reqs:
+        key = str(r.get("status") or "error")
+        status[key] = status.get(key, 0) + 1
+    return {
+        "count": len(reqs),
+        "errors": sum(1 for r in reqs if r.get("error")),
+        "retries": sum(r.get("retries", 0) for r in reqs),
+        "bytes": sum(r.get("bytes", 0) for r in reqs),
+        "status": status,
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "max": max(latencies) if latencies else None,
+        },
+    }
+
+
+def summarize(evts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    {"requests": 总体, "stalls": {"school/menu_type": 请求 + 解析}, "locations": {id: 耗时 / 写文件},
+     "stages": {名字: 秒}, "slowest_requests": [...]}
+    """
+    reqs = [e for e in evts if e["event"] == "request"]
+    stalls: Dict[str, Dict[str, Any]] = {}
+    for key in sorted({f"{e['school']}/{e['menu_type']}" for e in evts if e["event"] in ("request", "parse")}):
+        mine = [r for r in reqs if f"{r['school']}/{r['menu_type']}" == key]
+        parses = [e for e in evts if e["event"] == "parse" and f"{e['school']}/{e['menu_type']}" == key]
+        stalls[key] = {
+            "requests": _request_stats(mine),
+            "parse_ms": round(sum(p["ms"] for p in parses if not p["cached"]), 2),
+            "parses": len(parses),
+            "cached_parses": sum(1 for p in parses if p["cached"]),
+            "items": sum(p["items"] for p in parses),
+        }
+
+    locations: Dict[str, Dict[str, Any]] = {}
+    for e in evts:
+        if e["event"] == "location":
+            locations.setdefault(e["location"], {}).update(seconds=e["seconds"], ok=e["ok"])
+        elif e["event"] == "write":
+            locations.setdefault(e["location"], {}).update(
+                write_ms=e["ms"], changed=e["changed"], status=e["status"], items=e["items"]
+            )
+
+    slowest = sorted(reqs, key=lambda r: r["latency_ms"], reverse=True)[:5]
+    return {
+        "requests": _request_stats(reqs),
+        "stalls": stalls,
+        "locations": locations,
+        "stages": {e["stage"]: e["seconds"] for e in evts if e["event"] == "stage"},
+        "slowest_requests": [{"url": r["url"], "latency_ms": r["latency_ms"], "status": r.get("status")} for r in slowest],
+    }
+
+
+def write_report(started_at: datetime.datetime, seconds: float) -> Dict[str, Any]:
+    """写出这次运行的事件和汇总，并把汇总追加到 history.jsonl；返回汇总"""
+    evts = events()
+    summary = {"started_at": started_at.isoformat(timespec="seconds"), "seconds": round(seconds, 3), **summarize(evts)}
+
+    lines = [json.dumps(e, ensure_ascii=False) for e in evts]
+    lines.append(json.dumps({"event": "summary", **summary}, ensure_ascii=False))
+    atomic_io.write_bytes(EVENTS_PATH, ("\n".join(lines) + "\n").encode("utf-8"))
+
+    try:
+        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
+            history = [line for line in f.read().splitlines() if line.strip()]
+    except OSError:
+        history = []
+    history = history[-(HISTORY_KEEP - 1) :] + [json.dumps(summary, ensure_ascii=False, separators=(",", ":"))]
+    atomic_io.write_bytes(HISTORY_PATH, ("\n".join(history) + "\n").encode("utf-8"))
+    return summary
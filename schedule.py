@@ -0,0 +1,181 @@
+import datetime
+import functools
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import atomic_io
+import closures
+import registry
+
+# 营业时间的源数据：每个地点 / 档口一周的营业区间（当天 0 点起的分钟数），外加按日期的临时调整（放假、暴雪）。
+# 改营业时间、临时关门只改这个文件
+SCHEDULE_PATH = os.environ.get(
+    "WOLFIE_SCHEDULE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule.json")
+)
+
+# 编译出来给前端查的逐日区间表
+HOURS_PATH = "hours.json"
+
+# 从今天起编译多少天
+DAYS = int(os.environ.get("WOLFIE_HOURS_DAYS", "14"))
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# 一天的区间：None 表示营业时间不固定（Hours vary），[] 表示关门，否则 [[开, 关], ...]；
+# 关门时间可以超过 1440（营业到第二天凌晨）
+Intervals = Optional[List[List[int]]]
+
+
+@functools.lru_cache(maxsize=None)
+def load() -> Dict[str, Any]:
+    with open(SCHEDULE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _day_keys(key: str) -> List[int]:
+    """'mon-thu' -> [0, 1, 2, 3]；'sat' -> [5]"""
+    first, _, last = key.partition("-")
+    start = WEEKDAYS.index(first)
+    end = WEEKDAYS.index(last) if last else start
+    return list(range(start, end + 1))
+
+
+def _weekly_day(weekly: Optional[Dict[str, Any]], weekday: int) -> Intervals:
+    """周表里某一天的区间；周表为 None 时整周都是 Hours vary，周表里没写到的那天关门"""
+    if weekly is None:
+        return None
+    for key, intervals in weekly.items():
+        if weekday in _day_keys(key):
+            return [list(iv) for iv in intervals]
+    return []
+
+
+def overrides_on(d: datetime.date) -> Dict[str, Dict[str, Any]]:
+    """d 这天的临时调整 {地点 id: {...}}；同一天写了多条时后面的覆盖前面的"""
+    out: Dict[str, Dict[str, Any]] = {}
+    iso = d.isoformat()
+    for ov in load().get("overrides", []):
+        if ov["date"] == iso:
+            for loc_id, entry in ov.get("locations", {}).items():
+                out.setdefault(loc_id, {}).update(entry)
+    return out
+
+
+def location_day(
+    location_id: str, d: datetime.date, detected: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """
+    {"hours": 地点的区间, "stalls": {档口名: 区间}}，档口是 locations.json 里登记的那些。
+    档口没单独写时用 other_stalls，再没有就跟地点一样；
+    detected 为 closures.overrides() 的结果：Nutrislice 上写了关门的档口当天按关门算；
+    当天有临时调整时，调整里写到的覆盖，没写到的档口跟着调整后的地点走（除非调整里另有 other_stalls）。
+    schedule.json 是人写的，和 detected 冲突时以它为准。
+    """
+    base = load()["locations"].get(location_id, {"hours": None})
+    weekday = d.weekday()
+    hours = _weekly_day(base.get("hours"), weekday)
+
+    stalls: Dict[str, Intervals] = {}
+    for s in registry.stalls(location_id):
+        name = s["section"]
+        if name in base.get("stalls", {}):
+            stalls[name] = _weekly_day(base["stalls"][name], weekday)
+        elif "other_stalls" in base:
+            stalls[name] = _weekly_day(base["other_stalls"], weekday)
+        else:
+            stalls[name] = hours
+
+    closed = (detected or {}).get(d.isoformat(), {}).get(location_id)
+    if closed is not None:
+        if "hours" in closed:
+            hours = closed["hours"]
+        stalls.update(closed["stalls"])
+
+    ov = overrides_on(d).get(location_id)
+    if ov is not None:
+        if "hours" in ov:
+            hours = ov["hours"]
+        for name in stalls:
+            if name in ov.get("stalls", {}):
+                stalls[name] = ov["stalls"][name]
+            elif "other_stalls" in ov:
+                stalls[name] = ov["other_stalls"]
+            elif "hours" in ov:
+                stalls[name] = hours
+
+    return {"hours": hours, "stalls": stalls}
+
+
+def _clock(minutes: int) -> str:
+    h, m = divmod(minutes % 1440, 60)
+    suffix = "am" if h < 12 else "pm"
+    h = h % 12 or 12
+    return f"{h}{suffix}" if m == 0 else f"{h}:{m:02d}{suffix}"
+
+
+def format_hours(intervals: Intervals) -> str:
+    """[[660, 1200]] -> '11am to 8pm'；[] -> 'Closed'；None -> 'Hours vary'（和页面上显示的一致）"""
+    if intervals is None:
+        return "Hours vary"
+    if not intervals:
+        return "Closed"
+    return ", ".join(f"{_clock(start)} to {_clock(end)}" for start, end in intervals)
+
+
+def validate() -> None:
+    """schedule.json 里的地点 / 档口名必须在 locations.json 里，写错了直接报出来而不是悄悄当 Hours vary"""
+    known = {loc["id"]: {s["section"] for s in loc.get("stalls", [])} for loc in registry.all_locations()}
+    for entry in load()["locations"].values():
+        weeklies = [entry.get("hours"), entry.get("other_stalls"), *entry.get("stalls", {}).values()]
+        for weekly in weeklies:
+            for key in weekly or {}:
+                if not set(key.split("-")) <= set(WEEKDAYS):
+                    raise ValueError(f"{SCHEDULE_PATH}: bad day range {key!r}")
+    entries = [("locations", load()["locations"])] + [
+        (f"override {ov['date']}", ov.get("locations", {})) for ov in load().get("overrides", [])
+    ]
+    for where, locations in entries:
+        for loc_id, entry in locations.items():
+            if loc_id not in known:
+                raise ValueError(f"{SCHEDULE_PATH} {where}: unknown location {loc_id!r}")
+            unknown = set(entry.get("stalls", {})) - known[loc_id]
+            if unknown:
+                raise ValueError(f"{SCHEDULE_PATH} {where}: unknown stalls in {loc_id}: {sorted(unknown)}")
+
+
+def build_table(today: datetime.date, days: int = DAYS) -> Dict[str, Any]:
+    """
+    {"start": 第一天, "days": 天数, "locations": {hall_id: {"hours": [每天的区间], "stalls": {档口名: [每天的区间]}}},
+     "closures": {hall_id: {日期: {档口名: 原因}}}}
+    按 hall_id 存，前端直接拿 (今天 - start) 当下标。这次运行里认出来的关门（closures）一并算进去。
+    """
+    validate()
+    dates = [today + datetime.timedelta(days=i) for i in range(days)]
+    detected = closures.overrides(dates)
+    locations: Dict[str, Any] = {}
+    reasons: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for loc in registry.all_locations():
+        per_day = [location_day(loc["id"], d, detected) for d in dates]
+        locations[loc["hall_id"]] = {
+            "hours": [p["hours"] for p in per_day],
+            "stalls": {s["section"]: [p["stalls"][s["section"]] for p in per_day] for s in loc.get("stalls", [])},
+        }
+        for iso, by_location in detected.items():
+            if loc["id"] in by_location:
+                reasons.setdefault(loc["hall_id"], {})[iso] = by_location[loc["id"]]["reasons"]
+    return {"start": today.isoformat(), "days": days, "locations": locations, "closures": reasons}
+
+
+def write_hours(today: datetime.date, path: str = HOURS_PATH) -> Dict[str, Any]:
+    """写出逐日区间表，返回写进 manifest 的 {"file", "hash", "bytes", "start"}"""
+    body = json.dumps(build_table(today), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    atomic_io.write_bytes_if_changed(path, body)
+    return {"file": path, "hash": hashlib.sha256(body).hexdigest()[:16], "bytes": len(body), "start": today.isoformat()}
+
+
+if __name__ == "__main__":
+    info = write_hours(datetime.datetime.now(ZoneInfo("America/New_York")).date())
+    print(f"Successfully wrote {info['file']} ({info['bytes']} bytes, from {info['start']})")
@@ -0,0 +1,216 @@
+import datetime
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+import bundle
+import health
+import lookahead
+import menu_archive
+import menu_changes
+import nutrislice_cache
+import nutrislice_http
+import nutrition
+import registry
+import run_metrics
+import schedule
+import search_index
+
+# 设为 0 关掉本周剩余日期的 menus/<日期>/ 输出
+LOOKAHEAD = os.environ.get("WOLFIE_LOOKAHEAD", "1") != "0"
+
+
+def scheduled_locations() -> List[Tuple[str, Callable[[], None]]]:
+    """locations.json 里有 scraper 的地点；手工维护的 (scraper 为 null) 跳过"""
+    out: List[Tuple[str, Callable[[], None]]] = []
+    for loc in registry.all_locations():
+        fn = registry.scraper(loc)
+        if fn is not None:
+            out.append((loc["id"], fn))
+    return out
+
+
+NY_TZ = ZoneInfo("America/New_York")
+
+
+def ny_now() -> datetime.datetime:
+    """纽约当地时间（夏令时也对）；main() 开头取一次，各阶段发布的都是同一天"""
+    return datetime.datetime.now(NY_TZ)
+
+
+def prefetch(today: datetime.date) -> Tuple[int, int]:
+    """
+    按 registry 列出的 (school, menu_type, 日期) 先把所有周 payload 并发拉到缓存里，
+    同一周只算一次。各地点随后读的都是本地缓存；这里失败的由地点自己重试并报 fetch_error。
+    """
+    weeks: Dict[Tuple[str, str, str], datetime.date] = {}
+    for school, menu_type, d in registry.planned_fetches(today):
+        weeks.setdefault((school, menu_type, nutrislice_cache.week_key(d)), d)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=nutrislice_http.POOL_SIZE) as pool:
+        futures = {
+            pool.submit(nutrislice_cache.prefetch_week, school, menu_type, d): (school, menu_type)
+            for (school, menu_type, _), d in weeks.items()
+        }
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+            except Exception as e:
+                failed += 1
+                school, menu_type = futures[fut]
+                print(f"[prefetch] {school}/{menu_type} failed: {e}")
+
+    return len(weeks), failed
+
+
+def run_location(name: str, fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    ok = False
+    try:
+        fn()
+        ok = True
+    finally:
+        elapsed = time.perf_counter() - start
+        run_metrics.record("location", location=name, seconds=round(elapsed, 3), ok=ok)
+    return elapsed
+
+
+def stage_done(name: str, start: float) -> float:
+    seconds = time.perf_counter() - start
+    run_metrics.record("stage", stage=name, seconds=round(seconds, 3))
+    return seconds
+
+
+def main() -> int:
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    start = time.perf_counter()
+    failures: Dict[str, str] = {}
+    now = ny_now()
+    today = now.date()
+
+    weeks, failed = prefetch(today)
+    print(f"[prefetch] {weeks} weeks ({failed} failed) in {stage_done('prefetch', start):.2f}s")
+
+    # 每个地点一个任务；多档口地点内部再用自己的线程池并发（此时基本都是缓存命中）
+    locations = scheduled_locations()
+    stage_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(locations))) as pool:
+        futures = {pool.submit(run_location, name, fn): name for name, fn in locations}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                elapsed = fut.result()
+                print(f"[{name}] done in {elapsed:.2f}s")
+            except Exception as e:
+                failures[name] = str(e)
+                print(f"[{name}] failed: {e}")
+                traceback.print_exception(e)
+    stage_done("locations", stage_start)
+
+    if LOOKAHEAD:
+        stage_start = time.perf_counter()
+        try:
+            index = lookahead.write_lookahead(now)
+            print(f"[lookahead] {len(index['dates'])} dates in {lookahead.INDEX_PATH}")
+        except Exception as e:
+            failures["lookahead"] = str(e)
+            print(f"[lookahead] failed: {e}")
+            traceback.print_exception(e)
+        stage_done("lookahead", stage_start)
+
+    stage_start = time.perf_counter()
+    try:
+        added = menu_archive.archive_current(today)
+        print(f"[archive] {added} new rows in {menu_archive.ARCHIVE_PATH}")
+    except Exception as e:
+        failures["archive"] = str(e)
+        print(f"[archive] failed: {e}")
+        traceback.print_exception(e)
+    stage_done("archive", stage_start)
+
+    # 营养表先于 bundle：它可能往 dishes.json 里加菜名，bundle 里记的是加完之后的字典
+    table = None
+    if nutrition.ENABLED:
+        stage_start = time.perf_counter()
+        try:
+            table = nutrition.write_table(today)
+            print(f"[nutrition] {table['count']} foods, {table['bytes']} bytes ({table['dropped']} over budget)")
+        except Exception as e:
+            failures["nutrition"] = str(e)
+            print(f"[nutrition] failed: {e}")
+            traceback.print_exception(e)
+        stage_done("nutrition", stage_start)
+
+    # 所有地点写完后再打包，manifest 里记下 bundle 的内容 hash
+    # 任何一步失败都照样写 manifest（只带成功的那些）、metrics 和 status.json
+    stage_start = time.perf_counter()
+    info = None
+    try:
+        info = bundle.write_bundle()
+        print(f"[bundle] {info['file']} {info['bytes']} bytes, gzip {info['gzip_bytes']} bytes, hash {info['hash']}")
+    except Exception as e:
+        failures["bundle"] = str(e)
+        print(f"[bundle] failed: {e}")
+        traceback.print_exception(e)
+    search = None
+    try:
+        search = search_index.write_index()
+        print(f"[search] {search['file']} {search['bytes']} bytes")
+    except Exception as e:
+        failures["search"] = str(e)
+        print(f"[search] failed: {e}")
+        traceback.print_exception(e)
+    changes = None
+    try:
+        changed = ", ".join(sorted(menu_changes.pending())) or "none"
+        changes = menu_changes.write_changes()
+        print(f"[changes] seq {changes['seq']} (changed: {changed}) -> {changes['file']}")
+    except Exception as e:
+        failures["changes"] = str(e)
+        print(f"[changes] failed: {e}")
+        traceback.print_exception(e)
+    hours = None
+    try:
+        hours = schedule.write_hours(today)
+        print(f"[hours] {hours['file']} {hours['bytes']} bytes from {hours['start']}")
+    except Exception as e:
+        failures["hours"] = str(e)
+        print(f"[hours] failed: {e}")
+        traceback.print_exception(e)
+    registry.write_manifest(bundle=info, search=search, nutrition=table, changes=changes, hours=hours)
+    stage_done("publish", stage_start)
+
+    print(f"All locations finished in {time.perf_counter() - start:.2f}s")
+
+    summary = None
+    if run_metrics.ENABLED:
+        try:
+            summary = run_metrics.write_report(started_at, time.perf_counter() - start)
+            req = summary["requests"]
+            print(
+                f"[metrics] {req['count']} requests, {req['retries']} retries, {req['errors']} errors, "
+                f"p95 {req['latency_ms']['p95']} ms -> {run_metrics.EVENTS_PATH}"
+            )
+        except Exception as e:
+            print(f"[metrics] failed: {e}")
+
+    try:
+        status = health.write_status(summary)
+        problems = ", ".join(status["problems"]) or "none"
+        print(f"[status] {status['overall']} (problems: {problems}) -> {health.STATUS_PATH}")
+    except Exception as e:
+        print(f"[status] failed: {e}")
+
+    if failures:
+        print(f"Failed locations: {', '.join(sorted(failures))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
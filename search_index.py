@@ -0,0 +1,126 @@
+import bisect
+import hashlib
+import json
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+import atomic_io
+import dish_dict
+import menu_archive
+import registry
+
+# 前端直接加载的倒排索引；菜名用 dishes.json 里的 dish id 表示
+SEARCH_INDEX_PATH = "search_index.json"
+
+# 查询词查不到前缀时退回 trigram 模糊匹配：和词表里某个词的 trigram 相似度至少这么多
+FUZZY_THRESHOLD = 0.5
+
+MIN_WORD = 2
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def build_index(dictionary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {"words": [排好序的词表], "postings": [每个词对应的 dish id 列表],
+     "spots": [[data_key, section, meal], ...], "where": {dish id: [spots 下标]}}
+    前缀查询在 words 上二分；拼错的词在 words 上算 trigram 相似度。
+    收的是页面上显示的菜：跳过 chain 链接和出错的，抓取失败时沿用上一次的（stale）照样收，
+    不然 Nutrislice 一挂索引就空了。
+    """
+    spots: List[List[str]] = []
+    spot_ids: Dict[tuple, int] = {}
+    where: Dict[int, List[int]] = {}
+    for loc in registry.all_locations():
+        out = atomic_io.read_json(loc["output"])
+        if out is None:
+            continue
+        for _, meal, section, item in menu_archive.rows_from_output(out, "", include_stale=True):
+            spot = (loc["data_key"], section, meal)
+            if spot not in spot_ids:
+                spot_ids[spot] = len(spots)
+                spots.append(list(spot))
+            refs = where.setdefault(dish_dict.intern(dictionary, item), [])
+            if spot_ids[spot] not in refs:
+                refs.append(spot_ids[spot])
+
+    postings: Dict[str, Set[int]] = {}
+    for dish_id in where:
+        for word in dictionary["dishes"][dish_id][1].split():
+            postings.setdefault(word, set()).add(dish_id)
+
+    words = sorted(postings)
+    return {
+        "words": words,
+        "postings": [sorted(postings[w]) for w in words],
+        "spots": spots,
+        "where": {str(k): v for k, v in sorted(where.items())},
+    }
+
+
+def _word_matches(index: Dict[str, Any], word: str) -> Set[int]:
+    words = index["words"]
+    ids: Set[int] = set()
+    i = bisect.bisect_left(words, word)
+    while i < len(words) and words[i].startswith(word):
+        ids.update(index["postings"][i])
+        i += 1
+    if ids:
+        return ids
+
+    # 拼错了：找 trigram 相似度够高的词（词表的 trigram 第一次用到时算好挂在 index 上）
+    if "_grams" not in index:
+        index["_grams"] = [trigrams(w) for w in words]
+    grams = trigrams(word)
+    for i, other in enumerate(index["_grams"]):
+        if len(grams & other) >= FUZZY_THRESHOLD * max(len(grams), len(other)):
+            ids.update(index["postings"][i])
+    return ids
+
+
+def query(index: Dict[str, Any], dishes: List[List[str]], text: str) -> List[Dict[str, Any]]:
+    """每个词都要命中（前缀或模糊）；返回 [{"id", "name", "where": [[data_key, section, meal]]}]，按名字排序"""
+    words = [w for w in dish_dict.normalize_key(text).split() if len(w) >= MIN_WORD]
+    if not words:
+        return []
+
+    result: Optional[Set[int]] = None
+    for word in words:
+        ids = _word_matches(index, word)
+        result = ids if result is None else result & ids
+        if not result:
+            return []
+
+    spots = index["spots"]
+    return sorted(
+        (
+            {"id": i, "name": dishes[i][0], "where": [spots[s] for s in index["where"].get(str(i), [])]}
+            for i in result or ()
+        ),
+        key=lambda r: r["name"],
+    )
+
+
+def write_index(path: str = SEARCH_INDEX_PATH) -> Dict[str, Any]:
+    """写出索引（以及可能新增了菜名的 dishes.json），返回 {"file", "hash", "bytes", "dishes"} 给 manifest"""
+    dictionary = dish_dict.load()
+    index = build_index(dictionary)
+    dishes = dish_dict.save(dictionary)
+
+    body = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    atomic_io.write_bytes_if_changed(path, body)
+    return {"file": path, "hash": hashlib.sha256(body).hexdigest()[:16], "bytes": len(body), "dishes": dishes}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(SEARCH_INDEX_PATH, "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        for r in query(idx, dish_dict.load()["dishes"], " ".join(sys.argv[1:])):
+            print(r["name"], "->", "; ".join(" / ".join(x for x in spot if x) for spot in r["where"]))
+    else:
+        info = write_index()
+        print(f"Successfully wrote {info['file']} ({info['bytes']} bytes)")
@@ -0,0 +1,186 @@
+"""
+nutrislice_cache：下载时记下每一天的偏移，之后 load_day / get_day 只 seek + 解码那一天；
+解析结果按 payload 版本缓存。nutrislice_http.get 换成本地的假响应，不连网。
+"""
+import datetime
+import json
+
+import pytest
+import requests
+
+import nutrislice_cache
+import run_metrics
+
+SCHOOL = "east-side-dining"
+MENU_TYPE = "todays-dine-in-specials-esd"
+DAY = datetime.date(2026, 10, 14)
+
+
+def _payload(name):
+    days = []
+    for i in range(7):
+        d = datetime.date(2026, 10, 11) + datetime.timedelta(days=i)
+        days.append(
+            {
+                "date": d.isoformat(),
+                "menu_items": [
+                    {"text": "Grill Lunch", "is_section_title": True},
+                    {"food": {"name": f"{name} {d.day}", "rounded_nutrition_info": {"calories": 500 + i}}},
+                ],
+            }
+        )
+    return json.dumps({"start_date": "2026-10-11", "days": days}).encode("utf-8")
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.retries = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), 7):
+            yield self.body[i : i + 7]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeNutrislice:
+    """按顺序回放 responses；每项是 FakeResponse 或要抛出的异常"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, stream=False, **kwargs):
+        self.calls.append(dict(headers or {}))
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    monkeypatch.setattr(nutrislice_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(nutrislice_cache, "_failed", {})
+    monkeypatch.setattr(run_metrics, "ENABLED", False)
+    server = FakeNutrislice()
+    monkeypatch.setattr(nutrislice_cache.nutrislice_http, "get", server.get)
+    return server
+
+
+def _names(day):
+    return [mi["food"]["name"] for mi in day["menu_items"] if mi.get("food")]
+
+
+def test_download_records_day_offsets(fake):
+    fake.responses.append(FakeResponse(200, _payload("Burger"), {"ETag": '"v1"'}))
+    day = nutrislice_cache.get_day(SCHOOL, MENU_TYPE, DAY)
+    assert _names(day) == ["Burger 14"]
+    # MENU_FIELDS 之外的字段解码时就丢了
+    assert "rounded_nutrition_info" not in day["menu_items"][1]["food"]
+
+    path = nutrislice_cache.cache_path(SCHOOL, MENU_TYPE, DAY)
+    with open(nutrislice_cache._meta_path(path), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta["etag"] == '"v1"'
+    assert sorted(meta["days"]) == [f"2026-10-{d}" for d in range(11, 18)]
+    with open(path, "rb") as f:
+        body = f.read()
+    offset, length = meta["days"]["2026-10-14"]
+    assert json.loads(body[offset : offset + length])["date"] == "2026-10-14"
+
+
+def test_load_day_caches_parse_per_version(fake, monkeypatch):
+    fake.responses.append(FakeResponse(200, _payload("Burger"), {"ETag": '"v1"'}))
+    parses = []
+
+    def parse(day):
+        parses.append(day["date"])
+        return {"status": "ok", "items": _names(day)}
+
+    assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, DAY, parse, "test:v1") == {"status": "ok", "items": ["Burger 14"]}
+    # 同一周的另一天：不再请求，只解码那一天
+    other = DAY + datetime.timedelta(days=1)
+    assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, other, parse, "test:v1")["items"] == ["Burger 15"]
+    # 解析结果命中缓存，parse 不再调用
+    assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, DAY, parse, "test:v1")["items"] == ["Burger 14"]
+    assert parses == ["2026-10-14", "2026-10-15"]
+    assert len(fake.calls) == 1
+
+    # 过期后条件请求：304 时沿用解析缓存
+    monkeypatch.setattr(nutrislice_cache, "REVALIDATE_AFTER", 0)
+    fake.responses.append(FakeResponse(304))
+    assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, DAY, parse, "test:v1")["items"] == ["Burger 14"]
+    assert fake.calls[-1] == {"If-None-Match": '"v1"'}
+    assert parses == ["2026-10-14", "2026-10-15"]
+
+    # payload 变了：版本变了，重新解析
+    fake.responses.append(FakeResponse(200, _payload("Tacos"), {"ETag": '"v2"'}))
+    assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, DAY, parse, "test:v1")["items"] == ["Tacos 14"]
+    assert parses == ["2026-10-14", "2026-10-15", "2026-10-14"]
+
+
+def _outage():
+    error = requests.ConnectionError("Nutrislice is down")
+    error.retries = 3
+    return error
+
+
+@pytest.mark.parametrize("failure", ["error", "truncated"])
+def test_failed_revalidation_is_tried_once_per_run(fake, monkeypatch, failure):
+    fake.responses.append(FakeResponse(200, _payload("Burger"), {"ETag": '"v1"'}))
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+
+    # 下一次运行：缓存过期，Nutrislice 挂了（请求失败 / body 下到一半断了）
+    monkeypatch.setattr(nutrislice_cache, "REVALIDATE_AFTER", 0)
+    if failure == "error":
+        fake.responses.append(_outage())
+    else:
+        fake.responses.append(FakeResponse(200, _payload("Tacos")[:300], {"ETag": '"v2"'}))
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+    assert len(fake.calls) == 2
+
+    # 之后这次运行里同一周的所有读取都直接用旧缓存，不再请求（每次请求都带完整的重试和 backoff）
+    parse = lambda day: {"status": "ok", "items": _names(day)}
+    for i in range(4):
+        d = DAY + datetime.timedelta(days=i - 3)
+        assert nutrislice_cache.load_day(SCHOOL, MENU_TYPE, d, parse, "test:v1")["items"] == [f"Burger {d.day}"]
+        assert _names(nutrislice_cache.get_day(SCHOOL, MENU_TYPE, d)) == [f"Burger {d.day}"]
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+    assert len(fake.calls) == 2
+    assert nutrislice_cache.fell_back(SCHOOL, MENU_TYPE)
+    assert not nutrislice_cache.fell_back(SCHOOL, "other-menu-type")
+
+    # 别的周不受影响
+    fake.responses.append(FakeResponse(200, _payload("Burger")))
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY + datetime.timedelta(days=7))
+    assert len(fake.calls) == 3
+
+
+def test_failed_download_without_cache_is_tried_once_per_run(fake):
+    fake.responses.append(_outage())
+    with pytest.raises(requests.ConnectionError):
+        nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+    with pytest.raises(RuntimeError, match="failed earlier in this run"):
+        nutrislice_cache.load_day(SCHOOL, MENU_TYPE, DAY, lambda day: day, "test:v1")
+    assert len(fake.calls) == 1
+
+
+def test_next_run_revalidates_again(fake, monkeypatch):
+    fake.responses.append(FakeResponse(200, _payload("Burger"), {"ETag": '"v1"'}))
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+    monkeypatch.setattr(nutrislice_cache, "REVALIDATE_AFTER", 0)
+    fake.responses.append(_outage())
+    nutrislice_cache.prefetch_week(SCHOOL, MENU_TYPE, DAY)
+
+    # 新进程里 _failed 是空的
+    monkeypatch.setattr(nutrislice_cache, "_failed", {})
+    fake.responses.append(FakeResponse(304))
+    assert _names(nutrislice_cache.get_day(SCHOOL, MENU_TYPE, DAY)) == ["Burger 14"]
+    assert len(fake.calls) == 3
+    assert not nutrislice_cache.fell_back(SCHOOL, MENU_TYPE)
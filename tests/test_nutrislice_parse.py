@@ -0,0 +1,154 @@
+"""
+nutrislice_parse 合并各 scraper 的解析逻辑之后，和原来每个 scraper 自己的 parse_day 逐条对照。
+fixtures/day_blocks.json 是手写的 day block；fixtures/expected.json 是用合并之前的
+roth / dental_cafe / sac / jasmine / eastdi / westdi 的 parse_day 跑出来的结果，不要手改。
+message 的措辞合并时统一过，只比 status 和菜品；关门的日子连 message 一起比。
+"""
+import json
+import os
+
+import pytest
+
+import eastdi_scrape
+import nutrislice_parse
+import westdi_scrape
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES, "day_blocks.json"), "r", encoding="utf-8") as f:
+    DAYS = json.load(f)
+DAYS["missing"] = None
+
+with open(os.path.join(FIXTURES, "expected.json"), "r", encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+FLAG = nutrislice_parse.HEADER_MODE_FLAG
+TEXT = nutrislice_parse.HEADER_MODE_TEXT
+
+# 旧 scraper -> 现在的 (header_mode, output)
+OPTIONS = {
+    "roth": (FLAG, nutrislice_parse.OUTPUT_FLAT),
+    "dental": (FLAG, nutrislice_parse.OUTPUT_SECTIONS),
+    "sac": (TEXT, nutrislice_parse.OUTPUT_FLAT),
+    "jasmine": (TEXT, nutrislice_parse.OUTPUT_FLAT),
+}
+
+MEAL_PARSERS = {"east": eastdi_scrape.parse_day, "west": westdi_scrape.parse_day}
+
+# 没有菜、只有 is_holiday 或写着 Closed 的文字条目：现在各处都认成关门（旧版只有 roth / dental 认带标题的 is_holiday）
+CLOSED_DAYS = {
+    "holiday": "Closed for Winter Break",
+    "holiday_untitled": "Closed",
+    "closed_notice": "Closed today - Happy Thanksgiving",
+}
+
+# menu_category 名字带空格 / 全是空格：sac、east、west 旧版原样当 section 名，现在和 roth / jasmine 一样 strip，空的退回 Other
+PADDED = "padded_categories"
+
+
+def _date(name):
+    return (DAYS[name] or {}).get("date", "2025-02-10")
+
+
+def _without_message(result):
+    return {k: v for k, v in result.items() if k != "message"}
+
+
+def _parity_cases(scrapers):
+    return [
+        (name, scraper)
+        for name in EXPECTED
+        for scraper in scrapers
+        if name not in CLOSED_DAYS and scraper in EXPECTED[name] and (name, scraper) != (PADDED, "sac")
+    ]
+
+
+@pytest.mark.parametrize("name,scraper", _parity_cases(["roth", "dental", "sac"]))
+def test_parse_day_matches_old_scraper(name, scraper):
+    header_mode, output = OPTIONS[scraper]
+    result = nutrislice_parse.parse_day(DAYS[name], _date(name), header_mode, output)
+    assert _without_message(result) == _without_message(EXPECTED[name][scraper])
+
+
+@pytest.mark.parametrize("name", [name for name in EXPECTED if name not in CLOSED_DAYS])
+def test_text_mode_matches_old_jasmine(name):
+    # 旧 jasmine 的 parse_day 只返回菜名列表
+    result = nutrislice_parse.parse_day(DAYS[name], _date(name), TEXT, nutrislice_parse.OUTPUT_FLAT)
+    assert result["items"] == EXPECTED[name]["jasmine"]
+
+
+@pytest.mark.parametrize("name", ["text_headers", "flag_headers", "category_fallbacks", "meals"])
+@pytest.mark.parametrize("header_mode", [FLAG, TEXT])
+def test_walk_sections_agrees_with_parse_day(name, header_mode):
+    section_map = nutrislice_parse.walk_sections(DAYS[name]["menu_items"], header_mode)
+    sections = nutrislice_parse.parse_day(DAYS[name], _date(name), header_mode, nutrislice_parse.OUTPUT_SECTIONS)
+    assert [{"section": s, "items": names} for s, names in section_map.items()] == sections["sections"]
+    if header_mode == FLAG:
+        assert sections["sections"] == EXPECTED[name]["dental"]["sections"]
+
+
+def test_flag_mode_only_takes_flagged_headers():
+    section_map = nutrislice_parse.walk_sections(DAYS["flag_headers"]["menu_items"], FLAG)
+    assert list(section_map) == ["Soups", "Deli", "Grab & Go"]
+    assert section_map["Deli"] == ["Turkey Club", "Italian Hero"]
+
+    section_map = nutrislice_parse.walk_sections(DAYS["flag_headers"]["menu_items"], TEXT)
+    assert list(section_map) == ["Soups", "Deli", "Served until 2pm", "Grab & Go"]
+
+
+@pytest.mark.parametrize(
+    "name", [name for name in EXPECTED if name not in CLOSED_DAYS and name != PADDED and "east_weekday" in EXPECTED[name]]
+)
+@pytest.mark.parametrize("hall", ["east", "west"])
+@pytest.mark.parametrize("is_weekend", [False, True])
+def test_meals_match_old_scraper(name, hall, is_weekend):
+    expected = EXPECTED[name][f"{hall}_{'weekend' if is_weekend else 'weekday'}"]
+    result = MEAL_PARSERS[hall](DAYS[name], _date(name), is_weekend)
+    assert _without_message(result) == _without_message(expected)
+
+
+def test_text_mode_skips_junk_items():
+    # 旧 sac / east / west 碰到非 dict 的条目直接抛异常；现在和旧 jasmine 一样跳过
+    result = nutrislice_parse.parse_day(DAYS["junk_items"], _date("junk_items"), TEXT)
+    assert result["items"] == EXPECTED["junk_items"]["jasmine"] == ["Bagel"]
+    meals = eastdi_scrape.parse_day(DAYS["junk_items"], _date("junk_items"), False)["meals"]
+    assert [b for blocks in meals.values() for b in blocks] == [{"section": "Bakery", "items": ["Bagel"]}]
+
+
+def test_padded_category_names():
+    result = nutrislice_parse.parse_day(DAYS[PADDED], _date(PADDED), TEXT)
+    assert result["items"] == EXPECTED[PADDED]["roth"]["items"] == EXPECTED[PADDED]["jasmine"]
+    for parse in MEAL_PARSERS.values():
+        meals = parse(DAYS[PADDED], _date(PADDED), False)["meals"]
+        assert meals["dinner"] == [
+            {"section": "Other", "items": ["Green Tea"]},
+            {"section": "Soup Station", "items": ["Miso Soup", "Onigiri"]},
+        ]
+
+
+@pytest.mark.parametrize("name", sorted(CLOSED_DAYS))
+@pytest.mark.parametrize("scraper", sorted(OPTIONS))
+def test_closed_days(name, scraper):
+    header_mode, output = OPTIONS[scraper]
+    result = nutrislice_parse.parse_day(DAYS[name], _date(name), header_mode, output)
+    key = "items" if output == nutrislice_parse.OUTPUT_FLAT else "sections"
+    assert result == {"status": "closed", "message": CLOSED_DAYS[name], key: []}
+
+
+@pytest.mark.parametrize("scraper", ["roth", "dental"])
+def test_flag_mode_holiday_unchanged(scraper):
+    # roth / dental 旧版就认 is_holiday，结果（含 message）一字不差
+    header_mode, output = OPTIONS[scraper]
+    result = nutrislice_parse.parse_day(DAYS["holiday"], _date("holiday"), header_mode, output)
+    assert result == EXPECTED["holiday"][scraper]
+
+
+@pytest.mark.parametrize("name", sorted(CLOSED_DAYS))
+@pytest.mark.parametrize("hall", ["east", "west"])
+@pytest.mark.parametrize("is_weekend", [False, True])
+def test_closed_days_meals(name, hall, is_weekend):
+    expected = EXPECTED[name][f"{hall}_{'weekend' if is_weekend else 'weekday'}"]
+    result = MEAL_PARSERS[hall](DAYS[name], _date(name), is_weekend)
+    assert result["status"] == "closed"
+    assert result["message"] == CLOSED_DAYS[name]
+    assert result["meals"] == expected["meals"]
@@ -0,0 +1,94 @@
+"""
+nutrislice_stream 的字节扫描器：按括号数层级切出每一天，不解码。
+这里用手写的 weeks payload 检查切出来的每一天和 json 解码的结果一致，不管 body 在哪里被切成块。
+"""
+import json
+
+import pytest
+
+import nutrislice_stream
+
+DAYS = [
+    {
+        "date": "2026-10-11",
+        "menu_items": [
+            {"text": "Grill [Lunch] {Specials}", "is_section_title": True},
+            {"food": {"name": 'Chef\'s "Famous" Burger', "rounded_nutrition_info": {"calories": 650}}},
+            {"food": {"name": "Back\\slash \\\" tricky ]} bracket"}, "menu_category": {"name": "Grill"}},
+        ],
+        "has_unpublished_menus": False,
+    },
+    {"date": "2026-10-12", "menu_items": []},
+    {
+        "date": "2026-10-13",
+        "menu_items": [
+            {"text": 'Note: "days": [ is just text', "is_holiday": True},
+            {"food": {"name": "Café Crème Brûlée", "icons": {"food_icons": [{"id": 1}, {"id": 2}]}}},
+        ],
+    },
+]
+
+PAYLOAD = {
+    "start_date": "2026-10-11",
+    "menu_type_id": 12,
+    "bold_allergen_ids": [[1, 2], []],
+    "days": DAYS,
+    "footer": {"links": [{"days": ["not", "menu", "days"]}]},
+}
+
+BODY = json.dumps(PAYLOAD, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def _chunks(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+def _assert_spans(spans):
+    assert [date for date, _, _ in spans] == [d["date"] for d in DAYS]
+    for (_, offset, raw), day in zip(spans, DAYS):
+        assert BODY[offset : offset + len(raw)] == raw
+        assert json.loads(raw) == day
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1000, len(BODY)])
+def test_day_spans_any_chunk_size(size):
+    _assert_spans(list(nutrislice_stream.iter_day_spans(_chunks(BODY, size))))
+
+
+def test_day_spans_split_at_every_byte():
+    # 两块，切口挨个试一遍：字符串中间、转义符和被转义的引号之间、括号前后
+    for cut in range(1, len(BODY)):
+        _assert_spans(list(nutrislice_stream.iter_day_spans([BODY[:cut], BODY[cut:]])))
+
+
+def test_index_days_and_read_day(tmp_path):
+    path = tmp_path / "week.json"
+    path.write_bytes(BODY)
+    index = nutrislice_stream.index_days(nutrislice_stream.iter_file_chunks(str(path), 16))
+    assert list(index) == [d["date"] for d in DAYS]
+
+    day = nutrislice_stream.read_day(str(path), index["2026-10-11"])
+    assert day["menu_items"][1] == {"food": {"name": 'Chef\'s "Famous" Burger'}}
+    assert "has_unpublished_menus" not in day
+    assert nutrislice_stream.read_day(str(path), index["2026-10-13"], fields=None) == DAYS[2]
+
+
+def test_find_day_in_file(tmp_path):
+    path = tmp_path / "week.json"
+    path.write_bytes(BODY)
+    day = nutrislice_stream.find_day_in_file(str(path), "2026-10-13", fields=None)
+    assert day == DAYS[2]
+    assert nutrislice_stream.find_day_in_file(str(path), "2026-10-20") is None
+
+
+@pytest.mark.parametrize("end", [1, 40, BODY.index(b"Famous"), BODY.index(b"2026-10-13") + 3, len(BODY) - 1])
+@pytest.mark.parametrize("size", [1, 64])
+def test_truncated_payload_raises(end, size):
+    with pytest.raises(ValueError):
+        list(nutrislice_stream.iter_day_spans(_chunks(BODY[:end], size)))
+
+
+def test_truncated_payload_index_raises():
+    # _download 靠这个异常丢掉不完整的下载，旧缓存原样保留
+    with pytest.raises(ValueError):
+        nutrislice_stream.index_days(_chunks(BODY[: len(BODY) // 2], 64))